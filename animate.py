@@ -0,0 +1,107 @@
+"""
+
+Headless animation export. Renders a rotation script frame by frame and
+streams the frames to a PNG sequence or as raw BGRA video, see
+tools/export.py. Without a script, the scene is dragged along DX DY with
+the speed following the ease curve.
+
+    python animate.py frames/frame_{:04d}.png [--frames 120] [--script keys.json]
+                      [--drag DX DY] [--grid N] [--queue 8]
+    python animate.py - | ffmpeg -f rawvideo -pix_fmt bgra -s 1300x650 -r 30 -i - demo.mp4
+
+A script is a JSON list of keyframes, orientations are unit quaternions
+(a, b, c, d) and are interpolated with slerp:
+
+    [{"frame": 0, "orientation": [1, 0, 0, 0]},
+     {"frame": 90, "orientation": [0.707, 0, 0.707, 0]}]
+
+"""
+
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from tools.components import Vector2D
+from tools.export import FrameQueue, RawWriter, saveImage
+from tools.scene import (defaultScene, gridScene, ease, EDGE_LENGTH, INTERSPACE, EASE_MAX,
+                         CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+from tools.transform import slerp
+from tools.visual import OffscreenCanvas
+
+
+def keyframed(keyframes, frames):
+    ''' orientation of every frame, holding the first and last keyframes '''
+    keyframes = sorted(keyframes, key=lambda key: key['frame'])
+    k = 0
+    for i in range(frames):
+        while k + 1 < len(keyframes) and keyframes[k + 1]['frame'] <= i:
+            k += 1
+        key = keyframes[k]
+        if i <= key['frame'] or k + 1 == len(keyframes):
+            yield key['orientation']
+        else:
+            after = keyframes[k + 1]
+            t = (i - key['frame']) / (after['frame'] - key['frame'])
+            yield slerp(key['orientation'], after['orientation'], t)
+
+
+def eased(drag, frames):
+    ''' per-frame drag deltas along drag, scaled by the ease curve '''
+    for i in range(frames):
+        speed = ease(i * EASE_MAX / frames)
+        yield Vector2D(drag.x * speed, drag.y * speed)
+
+
+def pngWriter(pattern):
+    def write(index, frame):
+        saveImage(frame, pattern.format(index))
+    return write
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', help="PNG file name pattern, or - for raw frames on stdout")
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--script', help="JSON keyframes, see above")
+    parser.add_argument('--drag', type=float, nargs=2, default=(8, 5))
+    parser.add_argument('--grid', type=int, help="n x n x n grid instead of the 2x2x2 cube")
+    parser.add_argument('--queue', type=int, default=8, help="frames buffered for the writer")
+    args = parser.parse_args()
+
+    if args.grid:
+        scale = 2 / args.grid
+        scene = gridScene(args.grid, EDGE_LENGTH * scale, INTERSPACE * scale)
+    else:
+        scene = defaultScene()
+    canvas = OffscreenCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+
+    if args.output == '-':
+        write = RawWriter()
+    else:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        write = pngWriter(args.output)
+
+    if args.script:
+        with open(args.script) as f:
+            steps = keyframed(json.load(f), args.frames)
+        step = scene.transform.setOrientation
+    else:
+        steps = eased(Vector2D(*args.drag), args.frames)
+        step = scene.rotate
+
+    start = time.perf_counter()
+    with FrameQueue(write, args.queue) as frames:
+        for s in steps:
+            step(s)
+            scene.update()
+            scene.draw(canvas)
+            # toArray copies, the queue owns the frame
+            frames.put(canvas.toArray())
+    if args.output == '-':
+        write.close()
+    print("{} frames, {:.1f} ms".format(args.frames, (time.perf_counter() - start) * 1000),
+          file=sys.stderr)
@@ -0,0 +1,359 @@
+"""
+
+Headless frame-time benchmark. Replays a scripted drag over n x n x n grids
+of cubes for every visibility mode and prints per-stage timings and p50/p99
+frame times as JSON.
+
+    python bench.py [--frames 120] [--sizes 8 64 512 4096] [--modes cubes faces zbuffer]
+                    [--detail 0 1 2 3]
+
+--detail runs every case at the given levels of tools.pacing.DETAIL_LEVELS.
+--components times the math types of tools/components.py instead, against
+the dict-backed types they replaced.
+--drift N rotates the scene transform N times by random small drags and
+reports how far the orientation gets from a rotation, exiting with status 1
+if either error is over DRIFT_TOLERANCE.
+--pick times building the pick grid and point queries for every size.
+--views times frames of the four tools.views cameras sharing one scene,
+drawn by worker threads and by one thread, against four separate scenes.
+--startup times imports and the first headless frame in fresh interpreters
+and checks them against STARTUP_BUDGET, exiting with status 1 if one is over.
+
+"""
+
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from math import cos, sin, sqrt
+
+import numpy as np
+
+from tools.components import Point, Quaternion, Vector, Vector2D
+from tools.pacing import DETAIL_LEVELS
+from tools.scene import (gridScene, EDGE_LENGTH, INTERSPACE,
+                         CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+from tools.transform import Transform
+from tools.views import View, MultiView, cameras
+from tools.visibility import VISIBILITY_MODES
+
+STAGES = ['transform', 'visibility', 'sort', 'rasterize']
+
+# what --startup runs in a fresh interpreter and whether it may load Qt
+STARTUP = {
+    'import tools.components': ('import tools.components', False),
+    'import tools.scene': ('import tools.scene', False),
+    'import tools.visual': ('import tools.visual', True),
+    'first frame': ('''
+from tools.scene import (defaultScene, CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN,
+                         SCREEN_TO_CENTER)
+from tools.visual import OffscreenCanvas
+canvas = OffscreenCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+scene = defaultScene()
+scene.update()
+scene.draw(canvas)
+''', True),
+}
+# largest | |q| - 1 | and |M M^T - I| --drift accepts, a few ulps
+DRIFT_TOLERANCE = 1e-12
+
+# ms from the first import to the end of the snippet, numpy alone is ~100
+STARTUP_BUDGET = {
+    'import tools.components': 200,
+    'import tools.scene': 250,
+    'import tools.visual': 400,
+    'first frame': 500,
+}
+
+
+def dragPath(frames):
+    ''' scripted mouse deltas, one per frame '''
+    return [Vector2D(8 * cos(t / 10), 5 * sin(t / 7)) for t in range(frames)]
+
+
+def percentile(times, p):
+    return float(np.percentile(times, p) * 1000)  # ms
+
+
+def run(cubes, frames, mode, detail=0):
+    # Qt is only loaded by the cases that draw
+    from tools.visual import OffscreenCanvas
+    n = round(cubes ** (1 / 3))
+    # n x n x n cubes in the same volume as the default 2x2x2 scene
+    scale = 2 / n
+    scene = gridScene(n, EDGE_LENGTH * scale, INTERSPACE * scale)
+    scene.visibility_mode = VISIBILITY_MODES[mode]()
+    scene.detail = DETAIL_LEVELS[detail]
+    canvas = OffscreenCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+    timings = {stage: [] for stage in STAGES + ['frame']}
+    for rot_dir in dragPath(frames):
+        t0 = time.perf_counter()
+        scene.rotate(rot_dir)
+        scene.update()
+        t1 = time.perf_counter()
+        visible = scene.visibility(canvas)
+        t2 = time.perf_counter()
+        order = scene.sort(visible)
+        t3 = time.perf_counter()
+        canvas.beginFrame()
+        scene.rasterize(canvas, visible, order)
+        canvas.endFrame()
+        t4 = time.perf_counter()
+        for stage, dt in zip(STAGES + ['frame'], [t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0]):
+            timings[stage].append(dt)
+    return {
+        'cubes': len(scene.cubes),
+        'mode': mode,
+        'detail': detail,
+        'frames': frames,
+        'stages': {stage: {'p50': percentile(timings[stage], 50),
+                           'p99': percentile(timings[stage], 99)}
+                   for stage in STAGES},
+        'frame': {'p50': percentile(timings['frame'], 50),
+                  'p99': percentile(timings['frame'], 99)},
+    }
+
+
+class DictVector:
+    ''' tools.components.Vector as it was before __slots__, for --components '''
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+    def __iter__(self):
+        return iter([self.x, self.y, self.z])
+
+    def normalize(self):
+        r = sqrt(self.x**2 + self.y**2 + self.z**2)
+        if r == 0:
+            return
+        self.x, self.y, self.z = self.x / r, self.y / r, self.z / r
+
+
+class DictPoint(object):
+    ''' tools.components.Point as it was, with its rest position and rotation '''
+    def __init__(self, x, y, z):
+        self.defx, self.defy, self.defz = x, y, z
+        self.x, self.y, self.z = x, y, z
+        self.rotation_quaternion = DictQuaternion(1, 0, 0, 0)
+
+    def __sub__(self, other):
+        return DictVector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+
+class DictQuaternion:
+    ''' tools.components.Quaternion as it was '''
+    def __init__(self, a, b, c, d):
+        self.a, self.b, self.c, self.d = a, b, c, d
+
+    def __mul__(self, other):
+        a, b, c, d = self.a, self.b, self.c, self.d
+        a_, b_, c_, d_ = other.a, other.b, other.c, other.d
+        aa = a*a_ - b*b_ - c*c_ - d*d_
+        bb = a*b_ + b*a_ + c*d_ - d*c_
+        cc = a*c_ - b*d_ + c*a_ + d*b_
+        dd = a*d_ + b*c_ - c*b_ + d*a_
+        return DictQuaternion(aa, bb, cc, dd)
+
+
+def allocated(make, number):
+    ''' bytes per instance of make(i), as traced by tracemalloc '''
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [make(i) for i in range(number)]
+    size = (tracemalloc.get_traced_memory()[0] - before) / number
+    tracemalloc.stop()
+    del items
+    return size
+
+
+def components(number=100000):
+    '''
+    bytes per instance and microseconds per operation of the math types,
+    against the dict-backed types they replaced where those had the
+    operation, and the ratio old / new
+    '''
+    p, v = Point(1.0, 2.0, 3.0), Vector(1.0, 2.0, 3.0)
+    q, r = Quaternion(1.0, 0.0, 0.0, 0.0), Quaternion(0.9, 0.1, 0.3, 0.2).normalize_()
+    old_p, old_v = DictPoint(1.0, 2.0, 3.0), DictVector(1.0, 2.0, 3.0)
+    old_q, old_r = DictQuaternion(q.a, q.b, q.c, q.d), DictQuaternion(r.a, r.b, r.c, r.d)
+    ops = {
+        'Point()': (lambda: Point(1.0, 2.0, 3.0), lambda: DictPoint(1.0, 2.0, 3.0)),
+        'Point - Point': (lambda: p - p, lambda: old_p - old_p),
+        'iter(Vector)': (lambda: tuple(v), lambda: tuple(old_v)),
+        'Vector.normalize_': (v.normalize_, old_v.normalize),
+        'Quaternion *': (lambda: q * r, lambda: old_q * old_r),
+        'Quaternion *=': (lambda: q.__imul__(r), None),
+        'Quaternion.toMatrix': (q.toMatrix, None),
+    }
+
+    def us(op):
+        return min(timeit.repeat(op, number=number, repeat=3)) / number * 1e6
+
+    sizes = {'new': allocated(lambda i: Point(i, i, i), number),
+             'old': allocated(lambda i: DictPoint(i, i, i), number)}
+    sizes['ratio'] = sizes['old'] / sizes['new']
+    times = {}
+    for name, (op, old_op) in ops.items():
+        times[name] = {'new': us(op)}
+        if old_op is not None:
+            times[name]['old'] = us(old_op)
+            times[name]['ratio'] = times[name]['old'] / times[name]['new']
+    return {'bytes per Point': sizes, 'us': times}
+
+
+def pick(cubes, queries=1000, seed=0):
+    ''' pick grid build and per-query time in ms on a rotated n x n x n grid '''
+    from tools.visual import OffscreenCanvas
+    n = round(cubes ** (1 / 3))
+    scale = 2 / n
+    scene = gridScene(n, EDGE_LENGTH * scale, INTERSPACE * scale)
+    scene.rotate(Vector2D(40, 25))
+    scene.update()
+    canvas = OffscreenCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+    scene.visibility(canvas)
+    rng = np.random.default_rng(seed)
+    points = rng.uniform((0, 0), (CANVAS_WIDTH, CANVAS_HEIGHT), (queries, 2)).tolist()
+    t0 = time.perf_counter()
+    scene.pick(canvas, *points[0])
+    t1 = time.perf_counter()
+    hits = sum(scene.pick(canvas, x, y) is not None for x, y in points)
+    t2 = time.perf_counter()
+    return {'cubes': len(scene.cubes), 'faces': len(scene.faces), 'hits': hits,
+            'build': (t1 - t0) * 1000, 'query': (t2 - t1) / queries * 1000}
+
+
+def views(cubes, frames, mode):
+    '''
+    p50 frame ms of the four cameras of tools.views in quarter canvases:
+    one scene drawn by a thread per view and by one thread, and one scene
+    per view, each transformed on its own
+    '''
+    from tools.visual import OffscreenCanvas
+    n = round(cubes ** (1 / 3))
+    scale = 2 / n
+    width, height = CANVAS_WIDTH // 2, CANVAS_HEIGHT // 2
+    cams = cameras(VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+
+    def makeViews():
+        return [View(name, OffscreenCanvas(width, height, vts, stc, rotation))
+                for name, rotation, vts, stc in cams]
+
+    def makeScene():
+        scene = gridScene(n, EDGE_LENGTH * scale, INTERSPACE * scale)
+        scene.visibility_mode = VISIBILITY_MODES[mode]()
+        return scene
+
+    result = {'cubes': n ** 3, 'mode': mode, 'frames': frames}
+    for name, workers in [('threads', len(cams)), ('one thread', 1)]:
+        scene = makeScene()
+        times = []
+        with MultiView(makeViews(), workers) as multiview:
+            for rot_dir in dragPath(frames):
+                t0 = time.perf_counter()
+                scene.rotate(rot_dir)
+                scene.update()
+                multiview.render(scene)
+                times.append(time.perf_counter() - t0)
+        result[name] = percentile(times, 50)
+    # what it takes without sharing: a scene per view
+    pairs = [(makeScene(), view) for view in makeViews()]
+    times = []
+    for rot_dir in dragPath(frames):
+        t0 = time.perf_counter()
+        for scene, view in pairs:
+            scene.rotate(rot_dir)
+            scene.update()
+            view.render(scene)
+        times.append(time.perf_counter() - t0)
+    result['separate scenes'] = percentile(times, 50)
+    return result
+
+
+def startup(repeat=5):
+    '''
+    median ms of every STARTUP snippet over repeat fresh interpreters, and
+    whether it loaded PyQt5
+    '''
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for name, (code, qt) in STARTUP.items():
+        # timed in the child, the interpreter's own startup isn't counted
+        child = ("import sys, time\nstart = time.perf_counter()\n" + code +
+                 "\nprint(time.perf_counter() - start, 'PyQt5' in sys.modules)")
+        times = []
+        for i in range(repeat):
+            out = subprocess.run([sys.executable, '-c', child], cwd=here, check=True,
+                                 capture_output=True, text=True).stdout.split()
+            times.append(float(out[0]) * 1000)
+            loaded = out[1] == 'True'
+        ms = float(np.median(times))
+        results[name] = {'ms': ms, 'budget': STARTUP_BUDGET[name], 'qt': loaded,
+                         'ok': ms <= STARTUP_BUDGET[name] and (qt or not loaded)}
+    return results
+
+
+def drift(updates, check_every=1000, seed=0):
+    '''
+    worst deviation of the orientation from unit length and of its matrix
+    from orthonormal, sampled every check_every updates as a frame would
+    '''
+    rng = np.random.default_rng(seed)
+    transform = Transform()
+    worst_norm = worst_matrix = 0.0
+    start = time.perf_counter()
+    for chunk in range(0, updates, check_every):
+        axes = rng.normal(size=(check_every, 3))
+        axes /= np.linalg.norm(axes, axis=1)[:, None]
+        angles = rng.uniform(0, 0.05, check_every)
+        for v, th in zip(axes.tolist(), angles.tolist()):
+            transform.rotate(v, th)
+        m = transform.matrix()
+        worst_norm = max(worst_norm, abs(np.linalg.norm(transform.orientation) - 1))
+        worst_matrix = max(worst_matrix, np.abs(m @ m.T - np.eye(3)).max())
+    return {'updates': updates,
+            'us per update': (time.perf_counter() - start) / updates * 1e6,
+            'max |q| - 1': worst_norm,
+            'max |M M^T - I|': worst_matrix,
+            'ok': bool(max(worst_norm, worst_matrix) <= DRIFT_TOLERANCE)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 64, 512, 4096])
+    parser.add_argument('--modes', nargs='+', default=list(VISIBILITY_MODES),
+                        choices=list(VISIBILITY_MODES))
+    parser.add_argument('--detail', type=int, nargs='+', default=[0],
+                        choices=range(len(DETAIL_LEVELS)))
+    parser.add_argument('--components', action='store_true')
+    parser.add_argument('--drift', type=int, metavar='N')
+    parser.add_argument('--pick', action='store_true')
+    parser.add_argument('--views', action='store_true')
+    parser.add_argument('--startup', action='store_true')
+    args = parser.parse_args()
+    if args.views:
+        print(json.dumps([views(cubes, args.frames, mode)
+                          for cubes in args.sizes for mode in args.modes], indent=2))
+        parser.exit()
+    if args.startup:
+        results = startup()
+        print(json.dumps(results, indent=2))
+        parser.exit(0 if all(r['ok'] for r in results.values()) else 1)
+    if args.components:
+        print(json.dumps(components(), indent=2))
+        parser.exit()
+    if args.drift:
+        result = drift(args.drift)
+        print(json.dumps(result, indent=2))
+        parser.exit(0 if result['ok'] else 1)
+    if args.pick:
+        print(json.dumps([pick(cubes) for cubes in args.sizes], indent=2))
+        parser.exit()
+    print(json.dumps([run(cubes, args.frames, mode, detail)
+                      for cubes in args.sizes for mode in args.modes
+                      for detail in args.detail], indent=2))
@@ -0,0 +1,61 @@
+"""
+
+Offline rendering of high resolution stills. The frame is rasterized in
+tiles by a pool of worker processes, see tools/tiles.py.
+
+    python render.py still.png [--size 3840x2160] [--grid N] [--drag DX DY]
+                               [--workers N] [--tile 256]
+
+"""
+
+
+import argparse
+import time
+
+from tools.components import Vector2D
+from tools.export import saveImage
+from tools.scene import (defaultScene, gridScene, EDGE_LENGTH, INTERSPACE,
+                         CANVAS_WIDTH, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+from tools.tiles import TileRenderer, RecordingCanvas
+from tools.visibility import FaceOrder
+
+
+def recordFrame(scene, width, height):
+    '''
+    polygons and colors of the scene in a width x height image. The canvas
+    is as wide as the window's and has the aspect ratio of the image.
+    '''
+    scale = width / CANVAS_WIDTH
+    canvas = RecordingCanvas(CANVAS_WIDTH, height / scale, VIEWER_TO_SCREEN, SCREEN_TO_CENTER,
+                             scale=scale)
+    scene.update()
+    canvas.render(scene)
+    return canvas.polygons, canvas.colors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--size', default='3840x2160')
+    parser.add_argument('--grid', type=int, help="n x n x n grid instead of the 2x2x2 cube")
+    parser.add_argument('--drag', type=float, nargs=2, default=(40, 25),
+                        help="rotate the scene as for a mouse drag of DX DY pixels")
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--tile', type=int, default=256)
+    args = parser.parse_args()
+
+    width, height = map(int, args.size.split('x'))
+    if args.grid:
+        # same volume as the default 2x2x2 scene
+        scale = 2 / args.grid
+        scene = gridScene(args.grid, EDGE_LENGTH * scale, INTERSPACE * scale)
+    else:
+        scene = defaultScene()
+    scene.visibility_mode = FaceOrder()
+    scene.rotate(Vector2D(*args.drag))
+    polygons, colors = recordFrame(scene, width, height)
+    with TileRenderer(width, height, args.tile, args.workers) as renderer:
+        start = time.perf_counter()
+        image = renderer.render(polygons, colors)
+        print("{} polygons, {:.1f} ms".format(len(polygons), (time.perf_counter() - start) * 1000))
+    saveImage(image, args.path)
@@ -0,0 +1,44 @@
+from tools.animation import Animator, EaseTable
+from tools.components import Vector2D
+
+
+def coast(frame_time):
+    ''' total drag distance coasted after a release, frames every frame_time s '''
+    moved = [0.0, 0.0]
+
+    def rotate(dx, dy):
+        moved[0] += dx
+        moved[1] += dy
+
+    animator = Animator(rotate, EaseTable(lambda u: 1 - u, 1), coast_time=1)
+    # 300 px/s to the right, moves every 10 ms
+    animator.drag([(1000 + 10 * i, Vector2D(3, 0)) for i in range(10)])
+    animator.release(1090, 0.0)
+    moved[:] = [0.0, 0.0]
+    now = 0.0
+    while animator.active:
+        now += frame_time
+        animator.advance(now)
+    return moved
+
+
+def test_ease_table_interpolates_and_clamps():
+    table = EaseTable(lambda t: t * t, 2)
+    assert abs(table(1) - 1) < 1e-3
+    assert table(-1) == 0
+    assert table(5) == 4
+
+
+def test_coasting_is_frame_rate_independent():
+    fast, slow = coast(1 / 120), coast(1 / 24)
+    # 300 px/s slowing down linearly for 1 s
+    assert abs(fast[0] - 150) < 5
+    assert abs(fast[0] - slow[0]) < 1e-9
+    assert fast[1] == slow[1] == 0
+
+
+def test_slow_release_stops():
+    animator = Animator(lambda dx, dy: None, EaseTable(lambda u: 1, 1))
+    animator.drag([(1000, Vector2D(0, 0)), (1050, Vector2D(0.1, 0))])
+    animator.release(1050, 0.0)
+    assert not animator.active
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('PyQt5.QtGui')
+
+from tools.scene import (CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER, Scene,
+                         defaultScene)
+from tools.visual import OffscreenCanvas
+
+
+def offscreen():
+    return OffscreenCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+
+
+def test_a_frame_paints_and_the_next_erases_it():
+    canvas = offscreen()
+    scene = defaultScene()
+    scene.update()
+    canvas.render(scene)
+    # the painter only lives for the frame
+    assert canvas.painter is None
+    drawn = (canvas.toArray()[..., :3] != 255).any(axis=-1)
+    assert drawn.any()
+    ys, xs = np.nonzero(drawn)
+    rect = canvas.last_rect
+    assert rect.left() <= xs.min() and xs.max() <= rect.right()
+    assert rect.top() <= ys.min() and ys.max() <= rect.bottom()
+    canvas.render(Scene())
+    assert (canvas.toArray()[..., :3] == 255).all()
+
+
+def test_offscreen_frames_are_repeatable():
+    images = []
+    for i in range(2):
+        canvas = offscreen()
+        scene = defaultScene()
+        scene.update()
+        canvas.render(scene)
+        images.append(canvas.toArray())
+    assert images[0].shape == (CANVAS_HEIGHT, CANVAS_WIDTH, 4)
+    assert np.array_equal(images[0], images[1])
+
+
+def test_benchmark_times_every_stage():
+    import bench
+    result = bench.run(8, 3, 'faces')
+    assert result['cubes'] == 8 and result['frames'] == 3
+    assert set(result['stages']) == set(bench.STAGES)
+    assert result['frame']['p50'] > 0
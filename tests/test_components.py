@@ -0,0 +1,44 @@
+import numpy as np
+
+from tools.components import Point, Point2D, Quaternion, Vector, Vector2D, fromBuffer
+from tools.transform import Transform
+
+
+def test_vector2d_sub():
+    # it used to assign other.y to self.y and build a 3D Vector from 2 values
+    a, b = Vector2D(5, 7), Vector2D(2, 3)
+    d = a - b
+    assert isinstance(d, Vector2D) and tuple(d) == (3, 4)
+    assert tuple(a) == (5, 7)
+    assert d.magnitude() == 5
+    assert tuple(Point2D(5, 7) - Point2D(2, 3)) == (3, 4)
+
+
+def test_many_views_a_buffer():
+    values = np.arange(12, dtype=np.float64)
+    points = Point.many(values.tobytes())
+    assert [tuple(p) for p in points] == [(0, 1, 2), (3, 4, 5), (6, 7, 8), (9, 10, 11)]
+    assert [tuple(v) for v in Vector2D.many(values[:4].tobytes())] == [(0, 1), (2, 3)]
+    assert [tuple(v) for v in Vector.many(values[:6].tobytes())] == [(0, 1, 2), (3, 4, 5)]
+    assert [tuple(p) for p in Point2D.many(values[:2].tobytes())] == [(0, 1)]
+    # no copy
+    view = fromBuffer(values, 3)
+    values[0] = 42
+    assert view[0, 0] == 42
+
+
+def test_to_matrix_matches_the_transform():
+    transform = Transform()
+    transform.rotate([0, 0.6, 0.8], 0.7)
+    q = Quaternion(*transform.orientation)
+    assert np.allclose(q.toMatrix(), transform.matrix())
+    # and rotates like q p q*
+    p = Quaternion(0, 1.0, 2.0, 3.0)
+    rotated = q * p * q.conj()
+    assert np.allclose(tuple(rotated.toVector()), q.toMatrix() @ (1, 2, 3))
+
+
+def test_slots():
+    for item in [Point(1, 2, 3), Vector(1, 2, 3), Vector2D(1, 2), Point2D(1, 2),
+                 Quaternion(1, 0, 0, 0)]:
+        assert not hasattr(item, '__dict__')
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('PyQt5.QtWidgets')
+
+from tools.glcanvas import meshArrays
+from tools.scene import defaultScene
+
+
+def test_mesh_arrays():
+    scene = defaultScene()
+    vertices, indices = meshArrays(scene)
+    faces = len(scene.faces)
+    assert vertices.shape == (4 * faces, 12) and vertices.dtype == np.float32
+    assert indices.shape == (faces, 6) and indices.max() == 4 * faces - 1
+    corners = vertices[:, 0:3].reshape(faces, 4, 3)
+    assert np.allclose(corners, scene.engine.rest[scene.faces])
+    # flat shading: every corner of a face has its center and normal
+    assert np.allclose(vertices[:, 3:6].reshape(faces, 4, 3), corners.mean(axis=1)[:, None])
+    assert np.allclose(vertices[:, 6:9].reshape(faces, 4, 3), scene.engine.rest_normals[:, None])
+    # two triangles per face, both within its 4 vertices
+    assert ((indices // 4) == np.arange(faces)[:, None]).all()
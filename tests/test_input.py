@@ -0,0 +1,61 @@
+from tools.components import Vector2D
+from tools.input import DragInput
+
+
+class Signal(object):
+    def __init__(self):
+        self.count = 0
+
+    def emit(self):
+        self.count += 1
+
+
+class Event(object):
+    ''' the parts of a QMouseEvent DragInput uses, it is its own QPoint '''
+    def __init__(self, x, y, timestamp):
+        self.at, self.time = (x, y), timestamp
+
+    def pos(self):
+        return self
+
+    def x(self):
+        return self.at[0]
+
+    def y(self):
+        return self.at[1]
+
+    def timestamp(self):
+        return self.time
+
+
+class Widget(DragInput):
+    def __init__(self):
+        self.interacted = Signal()
+        self.setupInput()
+
+
+def test_moves_are_queued_until_taken():
+    widget = Widget()
+    widget.mousePressEvent(Event(10, 10, 0))
+    for i in range(1, 6):
+        widget.mouseMoveEvent(Event(10 + 2 * i, 10 - i, 8 * i))
+    moves = widget.takeMoves()
+    assert [t for t, delta in moves] == [8, 16, 24, 32, 40]
+    total = Vector2D(sum(d.x for t, d in moves), sum(d.y for t, d in moves))
+    assert (total.x, total.y) == (10, -5)
+    assert widget.takeMoves() == []
+    widget.mouseReleaseEvent(Event(20, 5, 50))
+    assert widget.takeRelease() == 50 and widget.takeRelease() is None
+    assert widget.takeClick() is None
+    # every event asks for a frame
+    assert widget.interacted.count == 7
+
+
+def test_press_and_release_in_place_is_a_click():
+    widget = Widget()
+    widget.mouseMoveEvent(Event(5, 5, 0))
+    assert widget.takeMoves() == []
+    widget.mousePressEvent(Event(30, 40, 10))
+    widget.mouseReleaseEvent(Event(30, 40, 20))
+    clicked = widget.takeClick()
+    assert (clicked.x, clicked.y) == (30, 40)
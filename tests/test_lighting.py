@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from tools.lighting import ColorTable, Lighting, DirectionalLight, hsvToBgra
+
+
+def test_hsv_matches_qt():
+    QtGui = pytest.importorskip('PyQt5.QtGui')
+    hues, values = np.meshgrid(np.arange(360), np.arange(256), indexing='ij')
+    ours = hsvToBgra(hues, values)
+    for h in range(360):
+        for v in range(256):
+            c = QtGui.QColor.fromHsv(h, 255, v)
+            assert ours[h, v].tolist() == [c.blue(), c.green(), c.red(), 255], (h, v)
+
+
+def test_quantize_with_fewer_steps_picks_table_levels():
+    table = ColorTable([0, 90], 64)
+    levels = table.quantize(np.linspace(0, 1, 101), steps=8)
+    assert levels.min() == 0 and levels.max() == 63
+    assert len(set(levels.tolist())) == 8
+
+
+def test_lights_add_up_and_clip():
+    normals = np.array([(0, 0, 1), (0, 0, -1), (0, -1, 0)], dtype=float)
+    centers = np.zeros((3, 3))
+    lighting = Lighting([DirectionalLight((0, 0, 1), 0.8), DirectionalLight((0, -1, 0))],
+                        ambient=0.3)
+    assert np.allclose(lighting.intensity(normals, centers, np.array([0, 0, 1000])), [1, 0.3, 1])
+
+
+def test_lights_stay_fixed_in_the_world():
+    from tools.scene import (CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER,
+                             LIGHTINGS, gridScene)
+    from tools.tiles import RecordingCanvas
+    from tools.views import cameras
+    scene = gridScene(2)
+    scene.update()
+    brightness = {}
+    for lighting in LIGHTINGS:
+        scene.lighting = lighting
+        for name, rotation, vts, stc in cameras(VIEWER_TO_SCREEN, SCREEN_TO_CENTER):
+            canv = RecordingCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, vts, stc)
+            canv.rotation = rotation
+            brightness[lighting, name] = scene.visibility(canv).brightness
+    sun, headlight = LIGHTINGS[1], LIGHTINGS[0]
+    assert np.allclose(brightness[sun, 'front'], brightness[sun, 'top'])
+    assert np.allclose(brightness[sun, 'front'], brightness[sun, 'perspective'])
+    # a headlight lights what each camera faces
+    assert not np.allclose(brightness[headlight, 'front'], brightness[headlight, 'top'])
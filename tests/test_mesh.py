@@ -0,0 +1,23 @@
+import numpy as np
+
+from tools.scene import cubeMesh
+
+
+def test_touching_cubes_share_corners():
+    # edge length 40 gives cubes of edge 20, so these two touch
+    vertices, faces, normals, corners = cubeMesh([(0, 0, 0), (20, 0, 0)], 40)
+    assert vertices.shape == (12, 3) and faces.shape == (12, 4) and corners.shape == (2, 8)
+    assert len(set(corners[0]) & set(corners[1])) == 4
+    assert np.allclose(vertices[corners[1]] - (20, 0, 0), vertices[corners[0]])
+
+
+def test_normals_point_out_of_their_faces():
+    centers = np.array([(0, 0, 0), (100, -50, 30)], dtype=float)
+    vertices, faces, normals, corners = cubeMesh(centers, 40)
+    assert np.allclose(np.linalg.norm(normals, axis=1), 1)
+    face_centers = vertices[faces].mean(axis=1)
+    outward = face_centers - np.repeat(centers, 6, axis=0)
+    assert np.allclose(outward, normals * 10)
+    # every face is a planar quad perpendicular to its normal
+    edges = vertices[faces] - vertices[faces][:, :1]
+    assert np.allclose(np.einsum('fkj,fj->fk', edges, normals), 0)
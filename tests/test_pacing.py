@@ -0,0 +1,23 @@
+from tools.pacing import FramePacer, DETAIL_LEVELS
+
+
+def test_degrades_when_over_budget_and_restores():
+    pacer = FramePacer(30)
+    changes = [pacer.record(0.1) for i in range(FramePacer.DEGRADE_AFTER)]
+    assert changes[-1] and not any(changes[:-1])
+    assert pacer.detail is DETAIL_LEVELS[1]
+    assert pacer.interval() > pacer.budget
+    # the average has to come down first, then stay down RESTORE_AFTER frames
+    frames = 0
+    while pacer.level:
+        pacer.record(0.001)
+        frames += 1
+    assert frames >= FramePacer.RESTORE_AFTER
+    assert pacer.interval() == pacer.budget
+
+
+def test_steady_in_between():
+    pacer = FramePacer(30)
+    # between the headroom and the budget nothing changes
+    assert not any(pacer.record(0.75 / 30) for i in range(100))
+    assert pacer.level == 0
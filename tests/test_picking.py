@@ -0,0 +1,50 @@
+import numpy as np
+
+from tools.picking import PickGrid
+from tools.visibility import Visible
+
+EYE = 1000
+
+
+def squares(boxes, z):
+    ''' Visible of axis aligned squares (x0, y0, x1, y1), face f at depth z[f] '''
+    quads = np.array([[(x0, y0), (x1, y0), (x1, y1), (x0, y1)] for x0, y0, x1, y1 in boxes],
+                     dtype=float)
+    depths = np.repeat(np.array(z, dtype=float)[:, None], 4, axis=1)
+    n = len(boxes)
+    return Visible(quads, depths, np.ones(n, dtype=bool), np.ones(n), np.zeros(n, dtype=int),
+                   [], np.ones(n, dtype=bool), {}, np.zeros(n))
+
+
+def test_query_picks_the_nearest_face():
+    grid = PickGrid(400, 300, cell=32)
+    # face 1 is closer to the viewer, larger z
+    grid.build(squares([(10, 10, 200, 200), (100, 100, 300, 250)], [0, 50]), EYE)
+    assert grid.query(50, 50) == 0
+    assert grid.query(150, 150) == 1
+    assert grid.query(250, 240) == 1
+    assert grid.query(350, 20) is None
+    assert grid.query(-5, -5) is None
+
+
+def test_query_skips_hidden_faces():
+    visible = squares([(10, 10, 200, 200), (100, 100, 300, 250)], [0, 50])
+    visible.mask[1] = False
+    grid = PickGrid(400, 300)
+    grid.build(visible, EYE)
+    assert grid.query(150, 150) == 0
+    assert grid.query(250, 240) is None
+
+
+def test_scene_picks_the_front_cube():
+    from tools.scene import (CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER,
+                             Scene)
+    from tools.tiles import RecordingCanvas
+    canv = RecordingCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+    scene = Scene()
+    # two cubes on the line of sight through the center, the second in front
+    scene.addMany([(0, 0, -300), (0, 0, 0)], [0, 90])
+    scene.update()
+    cube, face = scene.pick(canv, canv.center.x, canv.center.y)
+    assert cube == 1 and face // 6 == 1
+    assert scene.pick(canv, 5, 5) is None
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.profiler import Profiler
+
+
+def test_concurrent_first_samples_are_kept():
+    for _ in range(50):
+        profiler = Profiler(enabled=True)
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda i: profiler.record('view', i), range(8)))
+        assert sorted(profiler.samples['view']) == list(range(8))
+
+
+def test_stats():
+    profiler = Profiler(window=3, enabled=True)
+    for seconds in (1, 2, 3, 4):
+        profiler.record('frame', seconds / 1000)
+    stats = profiler.stats()['frame']
+    assert stats['count'] == 3 and stats['max'] == 4
+
+
+def test_spans_record_only_while_enabled():
+    profiler = Profiler()
+    with profiler.span('update'):
+        pass
+    assert profiler.samples == {}
+    assert profiler.toggle()
+    for i in range(5):
+        with profiler.span('update'):
+            pass
+    counts, edges = profiler.histogram('update', bins=4)
+    assert counts.sum() == 5 and len(edges) == 5
+    profiler.reset()
+    assert profiler.stats() == {}
@@ -0,0 +1,27 @@
+import numpy as np
+
+from tools.components import Vector2D
+from tools.scene import (CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER,
+                         gridScene)
+from tools.tiles import RecordingCanvas
+
+
+def test_batch_matches_projecting_point_by_point():
+    canv = RecordingCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+    eye = canv.vts + canv.stc
+    scene = gridScene(3)
+    scene.rotate(Vector2D(40, 25))
+    scene.update()
+    visible = scene.visibility(canv)
+    verts = scene.engine.vertices
+    for f, face in enumerate(scene.faces):
+        corners = verts[face]
+        for (x, y, z), (px, py) in zip(corners, visible.quads[f]):
+            ratio = canv.vts / (eye - z)
+            assert np.isclose(px, x * ratio + canv.center.x)
+            assert np.isclose(py, y * ratio + canv.center.y)
+        # back faces are culled: the normal has to point towards the viewer
+        center = (corners[1] + corners[3]) / 2
+        assert visible.mask[f] == (scene.engine.normals[f] @ ((0, 0, eye) - center) > 0)
+    # a convex cube shows at most 3 faces
+    assert visible.mask.reshape(-1, 6).sum(axis=1).max() <= 3
@@ -0,0 +1,61 @@
+import numpy as np
+
+from tools.components import Vector2D
+from tools.scene import Scene, gridScene
+
+
+def test_update_reports_changes():
+    scene = gridScene(2)
+    # the first frame always draws
+    assert scene.update()
+    assert not scene.update()
+    scene.rotate(Vector2D(5, 0))
+    assert scene.update()
+    assert not scene.update()
+    scene.add((1000, 0, 0), 90)
+    assert scene.update()
+    assert not scene.update()
+
+
+def test_cubes_share_one_orientation():
+    scene = gridScene(2)
+    for drag in [Vector2D(30, 0), Vector2D(0, -12), Vector2D(7, 7)]:
+        scene.rotate(drag)
+    scene.update()
+    matrix = scene.transform.matrix()
+    assert np.allclose(scene.engine.vertices, scene.engine.rest @ matrix.T)
+    assert np.allclose(scene.engine.normals, scene.engine.rest_normals @ matrix.T)
+    # every cube keeps its shape, edges stay as long as at rest
+    for cube in scene.cubes:
+        edges = np.diff(scene.engine.vertices[cube.corners], axis=0)
+        rest = np.diff(scene.engine.rest[cube.corners], axis=0)
+        assert np.allclose(np.linalg.norm(edges, axis=1), np.linalg.norm(rest, axis=1))
+
+
+def test_grid_scene_layout():
+    scene = gridScene((4, 3, 2), edge_length=20, interspace=5)
+    assert len(scene.cubes) == 24 and len(scene.faces) == 144
+    centers = scene.engine.rest[scene.center_rows]
+    assert np.allclose(centers.mean(axis=0), 0)
+    # neighbours are an edge plus the interspace apart
+    assert np.allclose(np.unique(centers[:, 0]), [-22.5, -7.5, 7.5, 22.5])
+
+
+def test_adding_cubes_one_by_one_matches_adding_them_at_once():
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(-500, 500, (40, 3))
+    hues = (rng.integers(0, 6, 40) * 60).tolist()
+    together, one_by_one = Scene(), Scene()
+    together.addMany(centers, hues)
+    for center, hue in zip(centers, hues):
+        one_by_one.add(center, hue)
+    for scene in (together, one_by_one):
+        scene.update()
+    assert np.allclose(together.engine.vertices[together.faces],
+                       one_by_one.engine.vertices[one_by_one.faces])
+    assert np.array_equal(together.face_hues, one_by_one.face_hues)
+    assert np.allclose(together.cube_radius, one_by_one.cube_radius)
+    # the arrays grow inside their buffers, not by copying every add
+    faces = one_by_one.faces
+    one_by_one.add((0, 0, 0), hues[0])
+    assert one_by_one.faces.base is faces.base
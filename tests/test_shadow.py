@@ -0,0 +1,27 @@
+import numpy as np
+
+from tools.components import Vector2D
+from tools.scene import GROUND_DISTANCE, gridScene
+from tools.shadow import convexHull
+
+
+def test_shared_outline_matches_every_cube():
+    scene = gridScene(3)
+    scene.rotate(Vector2D(37, -21))
+    scene.update()
+    polygons = scene.shadowPolygons()
+    assert polygons.shape[0] == len(scene.cubes)
+    assert np.all(polygons[..., 1] == GROUND_DISTANCE)
+    for polygon, rows in zip(polygons, scene.corner_rows):
+        # the hull of the cube's own corners, flattened
+        ground = scene.engine.vertices[rows][:, ::2]
+        hull = ground[convexHull(ground.tolist())]
+        assert np.allclose(sorted(map(tuple, polygon[:, ::2])), sorted(map(tuple, hull)))
+
+
+def test_outline_follows_the_rotation():
+    scene = gridScene(2)
+    first = scene.shadowPolygons().copy()
+    scene.rotate(Vector2D(0, 40))
+    scene.update()
+    assert not np.allclose(scene.shadowPolygons(), first)
@@ -0,0 +1,61 @@
+import numpy as np
+
+from tools import snapshot
+from tools.components import Vector2D
+from tools.scene import Scene, gridScene
+
+
+def corners(scene):
+    return [cube.corners.tolist() for cube in scene.cubes]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'grid.cube')
+    scene = gridScene(3)
+    scene.rotate(Vector2D(40, 25))
+    scene.update()
+    scene.save(path)
+    loaded = Scene.load(path)
+    loaded.update()
+    assert np.allclose(loaded.engine.vertices, scene.engine.vertices, atol=1e-3)
+    assert np.array_equal(loaded.faces, scene.faces)
+    assert corners(loaded) == corners(scene)
+    assert loaded.face_colors == scene.face_colors
+
+
+def test_save_over_the_loaded_file(tmp_path):
+    # the loaded arrays are memory maps of path, saving must not pull the
+    # file out from under them
+    path = str(tmp_path / 'grid.cube')
+    gridScene(2).save(path)
+    scene = Scene.load(path)
+    before = corners(scene)
+    scene.add((1000, 0, 0), 45)
+    scene.save(path)
+    assert corners(scene)[:8] == before
+    scene.rotate(Vector2D(10, 0))
+    scene.update()
+    reloaded = Scene.load(path)
+    assert corners(reloaded) == corners(scene)
+    assert len(reloaded.cubes) == 9
+
+
+def test_orientation_only_save(tmp_path):
+    path = str(tmp_path / 'grid.cube')
+    scene = gridScene(2)
+    scene.save(path)
+    scene.rotate(Vector2D(30, 0))
+    scene.save(path)
+    arrays, orientation = snapshot.load(path)
+    assert np.array_equal(orientation, scene.transform.orientation)
+    assert not (tmp_path / 'grid.cube.partial').exists()
+
+
+def test_add_to_a_loaded_scene(tmp_path):
+    path = str(tmp_path / 'grid.cube')
+    gridScene(2).save(path)
+    loaded = Scene.load(path)
+    loaded.add((500, 0, 0), 90)
+    loaded.update()
+    assert len(loaded.cubes) == 9 and len(loaded.faces) == 54
+    assert np.allclose(loaded.engine.vertices[loaded.center_rows[-1]], (500, 0, 0))
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('module', ['tools.scene', 'tools.tiles', 'tools.views', 'tools.export',
+                                    'bench', 'render'])
+def test_import_does_not_load_qt(module):
+    # a fresh interpreter, this one may have loaded Qt already
+    code = "import sys, {}; print('PyQt5' in sys.modules)".format(module)
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    assert out.strip() == 'False'
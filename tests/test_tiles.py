@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from tools.scene import (CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER,
+                         defaultScene)
+from tools.tiles import RecordingCanvas, fillConvex
+from tools.visibility import FaceOrder, ZBuffer
+
+
+def recorder(scale=1):
+    return RecordingCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER, scale)
+
+
+def test_records_scaled_polygons():
+    scene = defaultScene()
+    scene.visibility_mode = FaceOrder()
+    scene.update()
+    canvas, double = recorder(), recorder(2)
+    canvas.render(scene)
+    double.render(scene)
+    assert len(canvas.polygons) == len(canvas.colors) > 0
+    assert all(np.allclose(2 * a, b) for a, b in zip(canvas.polygons, double.polygons))
+
+
+def test_rejects_the_z_buffer():
+    scene = defaultScene()
+    scene.visibility_mode = ZBuffer()
+    with pytest.raises(ValueError):
+        recorder().render(scene)
+
+
+def test_fill_convex():
+    image = np.zeros((10, 10, 4), dtype=np.uint8)
+    fillConvex(image, np.array([(2, 2), (8, 2), (8, 6), (2, 6)], dtype=float), (1, 2, 3, 255))
+    assert image[..., 3].sum() == 6 * 4 * 255
+    assert image[4, 5].tolist() == [1, 2, 3, 255]
+
+
+def test_taller_frames_are_centered():
+    from render import recordFrame
+    scene = defaultScene()
+    scene.visibility_mode = FaceOrder()
+    wide, _ = recordFrame(scene, 1000, 500)
+    square, _ = recordFrame(scene, 1000, 1000)
+    assert len(wide) == len(square)
+    assert all(np.allclose(a + (0, 250), b) for a, b in zip(wide, square))
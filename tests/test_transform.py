@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from tools.transform import Transform, TransformEngine, quatMul, slerp
+
+
+def worstDrift(updates, check_every=100):
+    '''
+    worst | |q| - 1 | and |M M^T - I| over random small drags, checked every
+    check_every updates as frames would
+    '''
+    rng = np.random.default_rng(0)
+    transform = Transform()
+    worst_norm = worst_matrix = 0.0
+    for chunk in range(updates // check_every):
+        axes = rng.normal(size=(check_every, 3))
+        axes /= np.linalg.norm(axes, axis=1)[:, None]
+        for v, th in zip(axes.tolist(), rng.uniform(0, 0.05, check_every).tolist()):
+            transform.rotate(v, th)
+        m = transform.matrix()
+        worst_norm = max(worst_norm, abs(np.linalg.norm(transform.orientation) - 1))
+        worst_matrix = max(worst_matrix, np.abs(m @ m.T - np.eye(3)).max())
+    return worst_norm, worst_matrix
+
+
+def test_rotation_stays_orthonormal():
+    assert max(worstDrift(20000)) < 1e-12
+
+
+@pytest.mark.slow
+def test_a_million_updates():
+    # the claim of bench.py --drift, under pytest --slow
+    assert max(worstDrift(1000000, check_every=1000)) < 1e-12
+
+
+def test_quarter_turn():
+    transform = Transform()
+    transform.rotate([0, 0, 1], np.pi / 2)
+    assert np.allclose(transform.matrix() @ [1, 0, 0], [0, 1, 0])
+
+
+def test_slerp_ends_and_middle():
+    q = np.array([1.0, 0, 0, 0])
+    r = np.array([np.cos(np.pi / 4), 0, np.sin(np.pi / 4), 0])
+    assert np.allclose(slerp(q, r, 0), q)
+    assert np.allclose(slerp(q, r, 1), r)
+    assert np.allclose(slerp(q, r, 0.5), [np.cos(np.pi / 8), 0, np.sin(np.pi / 8), 0])
+
+
+def test_engine_rotates_like_per_point_quaternions():
+    rng = np.random.default_rng(1)
+    transform = Transform()
+    engine = TransformEngine(transform)
+    points = rng.normal(size=(50, 3)) * 100
+    engine.add(points)
+    transform.rotate([0, 0.6, 0.8], 0.3)
+    transform.rotate([1, 0, 0], -1.1)
+    assert engine.update()
+    assert not engine.update()
+    q = transform.orientation
+    conj = q * (1, -1, -1, -1)
+    expected = [quatMul(quatMul(q, (0, *p)), conj)[1:] for p in points]
+    assert np.allclose(engine.vertices, expected)
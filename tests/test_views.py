@@ -0,0 +1,36 @@
+from tools.profiler import PROFILER
+from tools.scene import (CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER,
+                         gridScene)
+from tools.tiles import RecordingCanvas
+from tools.views import MultiView, View, cameras
+from tools.visibility import FaceOrder
+
+
+def makeViews():
+    views = []
+    for name, rotation, vts, stc in cameras(VIEWER_TO_SCREEN, SCREEN_TO_CENTER):
+        canv = RecordingCanvas(CANVAS_WIDTH // 2, CANVAS_HEIGHT // 2, vts, stc)
+        canv.rotation = rotation
+        views.append(View(name, canv))
+    return views
+
+
+def test_views_share_the_scene_pass_only():
+    scene = gridScene(2)
+    scene.visibility_mode = FaceOrder()
+    scene.update()
+    views = makeViews()
+    PROFILER.reset()
+    PROFILER.enabled = True
+    try:
+        with MultiView(views) as multiview:
+            multiview.render(scene)
+    finally:
+        PROFILER.enabled = False
+    assert all(view.canvas.polygons for view in views)
+    # the views leave the scene's own visibility pass alone
+    assert scene.visible is None
+    assert scene.shadow_polygons is not None
+    stats = PROFILER.stats()
+    assert stats['sort']['count'] == stats['rasterize']['count'] == len(views)
+    PROFILER.reset()
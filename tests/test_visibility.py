@@ -0,0 +1,48 @@
+import numpy as np
+
+from tools.visibility import clipNear, inFrustum
+
+VTS = STC = 500
+EYE = VTS + STC
+
+
+def test_clip_near_keeps_polygons_in_front():
+    square = np.array([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], dtype=float)
+    assert np.array_equal(clipNear(square, 10), square)
+    assert len(clipNear(square + (0, 0, 20), 10)) == 0
+
+
+def test_clip_near_cuts_at_the_plane():
+    square = np.array([(0, 0, 0), (1, 0, 0), (1, 0, 2), (0, 0, 2)], dtype=float)
+    clipped = clipNear(square, 1)
+    assert len(clipped) == 4
+    assert clipped[:, 2].max() == 1
+    assert np.allclose(sorted(map(tuple, clipped)), [(0, 0, 0), (0, 0, 1), (1, 0, 0), (1, 0, 1)])
+
+
+def test_in_frustum():
+    centers = np.array([
+        (0, 0, 0),  # in the middle
+        (0, 0, EYE + 100),  # behind the viewer
+        (5000, 0, 0),  # far to the right
+        (700, 0, 0),  # just outside, reaching in
+        (0, 0, EYE - 5),  # in front of the viewer, inside the near plane
+    ], dtype=float)
+    radius = np.array([10, 10, 10, 100, 1], dtype=float)
+    inside = inFrustum(centers, radius, VTS, STC, 1300, 650, 10)
+    assert inside.tolist() == [True, False, False, True, False]
+
+
+def test_scene_culls_cubes_out_of_view():
+    from tools.scene import (CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER,
+                             Scene)
+    from tools.tiles import RecordingCanvas
+    canv = RecordingCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+    scene = Scene()
+    # in view, far to the side, and behind the viewer
+    scene.addMany([(0, 0, 0), (20000, 0, 0), (0, 0, 2 * (VIEWER_TO_SCREEN + SCREEN_TO_CENTER))],
+                  [0, 90, 180])
+    scene.update()
+    visible = scene.visibility(canv)
+    assert visible.cube_mask[0] and not visible.cube_mask[1:].any()
+    assert visible.mask.reshape(-1, 6)[1:].sum() == 0
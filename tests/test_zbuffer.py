@@ -0,0 +1,62 @@
+import numpy as np
+
+from tools.components import Point2D
+from tools.visibility import Visible, ZBuffer
+
+VTS = STC = 500
+EYE = VTS + STC
+
+
+class Canvas(object):
+    width, height = 400, 300
+    vts, stc = VTS, STC
+    center = Point2D(200, 150)
+
+    def drawShadow(self, points):
+        pass
+
+    def drawRaster(self, bgra):
+        self.raster = bgra.copy()
+
+
+class Scene(object):
+    # hue 0 is red, hue 1 is blue
+    colors = type('Colors', (), {'bgra': np.array([[(0, 0, 255, 255)], [(255, 0, 0, 255)]],
+                                                  dtype=np.uint8)})
+    face_hues = np.array([0, 1])
+
+
+def distance(canv, corners, x, y):
+    ''' distance to the viewer of the plane of corners through the centers of pixels (x, y) '''
+    normal = np.cross(corners[1] - corners[0], corners[2] - corners[0])
+    # the view ray through a pixel is (u t, v t, EYE - VTS t), t > 0
+    rays = np.stack([x + 0.5 - canv.center.x, y + 0.5 - canv.center.y,
+                     np.full(len(x), -VTS)], axis=1)
+    return VTS * (normal @ (corners[0] - (0, 0, EYE))) / (rays @ normal)
+
+
+def inside(pts, x, y):
+    ''' True for the pixel centers (x, y) inside the triangle pts '''
+    cross = np.array([(bx - ax) * (y + 0.5 - ay) - (by - ay) * (x + 0.5 - ax)
+                      for (ax, ay), (bx, by) in zip(pts, np.roll(pts, -1, axis=0))])
+    return (cross >= 0).all(axis=0) | (cross <= 0).all(axis=0)
+
+
+def test_crossing_faces_are_ordered_by_true_depth():
+    canv = Canvas()
+    # a triangle slanted steeply in depth and an upright one crossing it
+    faces = [np.array([(-250, -120, -600), (250, -120, 400), (0, 150, -100)], dtype=float),
+             np.array([(-150, -140, -80), (150, -140, -80), (0, 140, -20)], dtype=float)]
+    quads = [f[:, :2] * (VTS / (EYE - f[:, 2]))[:, None] + (canv.center.x, canv.center.y)
+             for f in faces]
+    visible = Visible(np.array(quads), np.array([f[:, 2] for f in faces]), np.ones(2, dtype=bool),
+                      np.ones(2), np.zeros(2, dtype=int), [], np.ones(2, dtype=bool), {},
+                      np.zeros(2))
+    ZBuffer().rasterize(canv, Scene(), visible, [0, 1])
+    red = canv.raster[..., 2] == 255
+    y, x = np.nonzero(canv.raster[..., 3])
+    a, b = distance(canv, faces[0], x, y), distance(canv, faces[1], x, y)
+    # where both cover the pixel and aren't within rounding of each other
+    both = inside(quads[0], x, y) & inside(quads[1], x, y) & (abs(a - b) > 0.5)
+    assert both.sum() > 1000
+    assert np.array_equal(red[y, x][both], (a < b)[both])
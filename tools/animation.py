@@ -0,0 +1,99 @@
+import numpy as np
+
+# Frame-rate independent motion. Mouse drags rotate the scene directly; on
+# release the last drag velocity keeps the scene spinning and slows down
+# along an ease curve. The coasting is simulated in fixed STEP increments
+# of wall-clock time, however often frames are rendered, so a slow or
+# dropped frame changes how many steps run in one go, not the motion.
+
+
+class EaseTable(object):
+    '''
+    ease(t) for t in [0, span] sampled once into a lookup table, evaluated
+    by linear interpolation. t outside the span is clamped.
+    '''
+    def __init__(self, ease, span, samples=256):
+        self.span = span
+        self.ts = np.linspace(0, span, samples)
+        self.values = np.array([ease(t) for t in self.ts], dtype=float)
+        self.scale = (samples - 1) / span
+
+    def __call__(self, t):
+        x = min(max(t, 0), self.span) * self.scale
+        i = min(int(x), len(self.values) - 2)
+        return self.values[i] + (x - i) * (self.values[i + 1] - self.values[i])
+
+
+class Animator(object):
+    '''
+    Tracks the drag velocity and coasts after release. rotate(dx, dy) is
+    called with drag distances in pixels, velocities are in pixels per
+    second and times in seconds (time.monotonic).
+    '''
+    STEP = 1 / 120  # simulation timestep
+    MAX_STEPS = 30  # longest catch up after a stall, in steps
+    VELOCITY_WINDOW = 0.1  # drag velocity is averaged over this much time
+    MIN_SPEED = 20  # slower releases stop dead
+
+    def __init__(self, rotate, coast, coast_time=1.5):
+        self.rotate = rotate
+        self.coast = coast  # EaseTable over [0, 1], speed factor while coasting
+        self.coast_time = coast_time
+        self.recent = []  # (time, dx, dy) of the drag moves in the velocity window
+        self.velocity = (0.0, 0.0)
+        self.coasting = None  # time coasted so far, None when not coasting
+        self.clock = None  # simulated time, trails the wall clock by < STEP
+
+    @property
+    def active(self):
+        ''' True while frames are needed without further input '''
+        return self.coasting is not None
+
+    def drag(self, moves):
+        ''' apply (timestamp in ms, Vector2D delta) drag moves, stops coasting '''
+        for timestamp, delta in moves:
+            self.rotate(delta.x, delta.y)
+            self.recent.append((timestamp / 1000, delta.x, delta.y))
+        if moves:
+            self.coasting = None
+            latest = self.recent[-1][0]
+            self.recent = [m for m in self.recent if m[0] > latest - self.VELOCITY_WINDOW]
+
+    def stop(self):
+        self.coasting = None
+
+    def release(self, timestamp, now):
+        ''' start coasting with the velocity of the last drag moves, timestamp in ms '''
+        # holding still before letting go means no momentum
+        self.recent = [m for m in self.recent if m[0] > timestamp / 1000 - self.VELOCITY_WINDOW]
+        if len(self.recent) >= 2:
+            span = max(self.recent[-1][0] - self.recent[0][0], self.STEP)
+            # the first move ends the interval before the window
+            dx = sum(m[1] for m in self.recent[1:]) / span
+            dy = sum(m[2] for m in self.recent[1:]) / span
+            if np.hypot(dx, dy) >= self.MIN_SPEED:
+                self.velocity = (dx, dy)
+                self.coasting = 0.0
+                self.clock = now
+        self.recent = []
+
+    def advance(self, now):
+        ''' run the fixed steps up to now, returns True if anything moved '''
+        if self.coasting is None:
+            return False
+        steps = min(int((now - self.clock) / self.STEP), self.MAX_STEPS)
+        if steps == 0:
+            return False
+        self.clock = max(self.clock + steps * self.STEP, now - self.STEP)
+        dx = dy = 0.0
+        for i in range(steps):
+            factor = self.coast(self.coasting / self.coast_time)
+            dx += self.velocity[0] * factor * self.STEP
+            dy += self.velocity[1] * factor * self.STEP
+            self.coasting += self.STEP
+            if self.coasting >= self.coast_time:
+                self.coasting = None
+                break
+        # every step turns about the same axis, so they add up to one rotation
+        self.rotate(dx, dy)
+        return True
@@ -1,96 +1,167 @@
-# TODO: import
+from math import sqrt, cos, sin
+
+import numpy as np
+
+from tools.transform import quatToMatrix
+
+# Small math types. They are slotted, so an instance is a few fields and no
+# __dict__, iterate over a tuple rather than a list, and have in-place
+# variants of the arithmetic that comes up in loops. Bulk data (vertices,
+# normals) is kept in numpy arrays instead, see fromBuffer and many for
+# converting.
+
+
+def fromBuffer(buffer, width):
+    ''' (n, width) float64 view of a buffer of packed doubles, no copy '''
+    return np.frombuffer(buffer, dtype=np.float64).reshape(-1, width)
+
+
+class Vector2D(object):
+    __slots__ = ('x', 'y')
 
-class Vector2D:
     def __init__(self, x, y):
         self.x, self.y = x, y
 
+    @classmethod
+    def many(cls, buffer):
+        return [cls(x, y) for x, y in fromBuffer(buffer, 2).tolist()]
+
+    def __iter__(self):
+        return iter((self.x, self.y))
+
+    def __repr__(self):
+        return 'Vector2D({}, {})'.format(self.x, self.y)
+
+    def __add__(self, other):
+        return Vector2D(self.x + other.x, self.y + other.y)
+
     def __sub__(self, other):
-        x = self.x - other.x
-        y = self.y = other.y
-        return Vector(x, y)
+        return Vector2D(self.x - other.x, self.y - other.y)
 
     def __mul__(self, other):
+        ''' 2D cross product '''
         return self.x * other.y - self.y * other.x
 
+    def __iadd__(self, other):
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def __imul__(self, other):
+        ''' scale in place '''
+        self.x *= other
+        self.y *= other
+        return self
+
     def magnitude(self):
-        return sqrt(self.x**2 + self.y**2)
+        return sqrt(self.x * self.x + self.y * self.y)
+
+
+class Vector(object):
+    __slots__ = ('x', 'y', 'z')
 
-class Vector:
     def __init__(self, x, y, z, norm=False):
         self.x, self.y, self.z = x, y, z
         if norm:
-            self.normalize()
+            self.normalize_()
+
+    @classmethod
+    def many(cls, buffer):
+        return [cls(x, y, z) for x, y, z in fromBuffer(buffer, 3).tolist()]
 
     def __iter__(self):
-        return iter([self.x, self.y, self.z])
+        return iter((self.x, self.y, self.z))
+
+    def __repr__(self):
+        return 'Vector({}, {}, {})'.format(self.x, self.y, self.z)
+
+    def __add__(self, other):
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
 
     def __mul__(self, other):
-        if type(other) == type(self):
+        ''' dot product with a Vector, scaling by a number '''
+        if isinstance(other, Vector):
             return self.x * other.x + self.y * other.y + self.z * other.z
-        else:
-            return Vector(self.x * other, self.y * other, self.z * other)
+        return Vector(self.x * other, self.y * other, self.z * other)
 
     def __truediv__(self, other):
         return Vector(self.x / other, self.y / other, self.z / other)
 
+    def __imul__(self, other):
+        ''' scale in place '''
+        self.x *= other
+        self.y *= other
+        self.z *= other
+        return self
+
+    def __itruediv__(self, other):
+        self.x /= other
+        self.y /= other
+        self.z /= other
+        return self
+
+    def cross(self, other):
+        return Vector(self.y * other.z - self.z * other.y,
+                      self.z * other.x - self.x * other.z,
+                      self.x * other.y - self.y * other.x)
+
+    def magnitude(self):
+        return sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normalize_(self):
+        ''' scale to unit length in place, the zero vector stays as it is '''
+        r = self.magnitude()
+        if r != 0:
+            self.x, self.y, self.z = self.x / r, self.y / r, self.z / r
+        return self
+
     def normalize(self):
-        r = sqrt(self.x**2 + self.y**2 + self.z**2)
-        if r == 0:
-            return
-        self.x, self.y, self.z = self.x / r, self.y / r, self.z / r
+        self.normalize_()
 
     def toRotationQuaternion(self, half_angle):
-        return Quaternion(cos(half_angle),
-                          self.x * sin(half_angle),
-                          self.y * sin(half_angle),
-                          self.z * sin(half_angle))
-
-class Face:
-    def __init__(self, a, b, c, d):
-        self.points = [a, b, c, d]  # each point is an instance of Point
-
-    def draw(self, canv, cube_center, color):
-        pts = []
-        for point in self.points:
-            # each point is an instance of Point2D
-            pts.append(point.perspectivepoint(canv))
-        viewable = self.viewability(canv, cube_center)
-        if viewable > 0:
-            canv.drawFace(pts, brightness=viewable, color=color)
-
-    def viewability(self, canv, cube_center):
-        face_center_pt = (self.points[1] + self.points[3]) / 2
-        viewer_pt = Point(0, 0, canv.vts + canv.stc)
-        self.face_normal_vector = face_center_pt - cube_center
-        face_to_viewer_vector = viewer_pt - face_center_pt
-        self.face_normal_vector.normalize()
-        face_to_viewer_vector.normalize()
-        return self.face_normal_vector * face_to_viewer_vector
-
-    def drawShadow(self, canv, gnd):
-        pts = []
-        for point in self.points:
-            shadow_point = Point(point.x, gnd, point.z).perspectivepoint(canv)
-            pts.append(shadow_point)
-            canv.drawShadow(pts)
+        s = sin(half_angle)
+        return Quaternion(cos(half_angle), self.x * s, self.y * s, self.z * s)
 
 
 class Point2D(object):
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x, self.y = x, y
 
+    @classmethod
+    def many(cls, buffer):
+        return [cls(x, y) for x, y in fromBuffer(buffer, 2).tolist()]
+
+    def __iter__(self):
+        return iter((self.x, self.y))
+
+    def __repr__(self):
+        return 'Point2D({}, {})'.format(self.x, self.y)
+
     def __sub__(self, other):
-        x = self.x - other.x
-        y = self.y - other.y
-        return Vector2D(x, y)
+        # returns vector
+        return Vector2D(self.x - other.x, self.y - other.y)
+
 
 class Point(object):
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x, y, z):
-        self.defx, self.defy, self.defz = x, y, z  # default, reference values (of non-transformed cube)
-        self.reset()
+        self.x, self.y, self.z = x, y, z
+
+    @classmethod
+    def many(cls, buffer):
+        return [cls(x, y, z) for x, y, z in fromBuffer(buffer, 3).tolist()]
 
     def __iter__(self):
-        return iter([self.x, self.y, self.z])
+        return iter((self.x, self.y, self.z))
+
+    def __repr__(self):
+        return 'Point({}, {}, {})'.format(self.x, self.y, self.z)
 
     def __add__(self, other):
         return Point(self.x + other.x, self.y + other.y, self.z + other.z)
@@ -102,44 +173,44 @@ class Point(object):
     def __truediv__(self, other):
         return Point(self.x / other, self.y / other, self.z / other)
 
-    def reset(self):
-        self.x, self.y, self.z = self.defx, self.defy, self.defz
-        # initial identity quaternion
-        self.rotation_quaternion = Quaternion(1, 0, 0, 0) 
-
-    def transform(self, v, th):
-        # rotating point about v (unit vector) by angle th
-        new_quat = Quaternion(cos(th/2), *(v * sin(th/2)))
-        q = new_quat * self.rotation_quaternion
-        if q.a >= 1 or q.a <= -1:
-            return
-        half_angle = acos(q.a)
-        qv = q.toVector() / sin(half_angle)
-        qv.normalize()
-        a, b, c = qv.x, qv.y, qv.z
-        q = self.rotation_quaternion = Vector(a, b, c).toRotationQuaternion(half_angle)
-        w = Quaternion(0, self.defx, self.defy, self.defz)
-        res = (q * w * q.conj()).toVector()  # resulting point after transformation
-        self.x, self.y, self.z = res.x, res.y, res.z
-
-    def perspectivepoint(self, canv):
-        # called when drawing point
-        ratio = canv.vts / (canv.vts + canv.stc - self.z)
-        newx, newy = self.x * ratio, self.y * ratio
-        return Point2D(newx + canv.center.x, newy + canv.center.y)
-
-class Quaternion:
+    def __iadd__(self, other):
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        return self
+
+
+class Quaternion(object):
+    __slots__ = ('a', 'b', 'c', 'd')
+
     def __init__(self, a, b, c, d):
         self.a, self.b, self.c, self.d = a, b, c, d
 
+    @classmethod
+    def fromAxisAngle(cls, v, th):
+        ''' rotation about the unit vector v by angle th '''
+        return Vector(*v).toRotationQuaternion(th / 2)
+
+    def __iter__(self):
+        return iter((self.a, self.b, self.c, self.d))
+
     def __mul__(self, other):
         a, b, c, d = self.a, self.b, self.c, self.d
         a_, b_, c_, d_ = other.a, other.b, other.c, other.d
-        aa = a*a_ - b*b_ - c*c_ - d*d_
-        bb = a*b_ + b*a_ + c*d_ - d*c_
-        cc = a*c_ - b*d_ + c*a_ + d*b_
-        dd = a*d_ + b*c_ - c*b_ + d*a_
-        return Quaternion(aa, bb, cc, dd)
+        return Quaternion(a*a_ - b*b_ - c*c_ - d*d_,
+                          a*b_ + b*a_ + c*d_ - d*c_,
+                          a*c_ - b*d_ + c*a_ + d*b_,
+                          a*d_ + b*c_ - c*b_ + d*a_)
+
+    def __imul__(self, other):
+        ''' compose in place, self = self * other '''
+        a, b, c, d = self.a, self.b, self.c, self.d
+        a_, b_, c_, d_ = other.a, other.b, other.c, other.d
+        self.a = a*a_ - b*b_ - c*c_ - d*d_
+        self.b = a*b_ + b*a_ + c*d_ - d*c_
+        self.c = a*c_ - b*d_ + c*a_ + d*b_
+        self.d = a*d_ + b*c_ - c*b_ + d*a_
+        return self
 
     def __str__(self):
         return "<{}, {}, {}, {}>".format(self.a, self.b, self.c, self.d)
@@ -148,53 +219,17 @@ class Quaternion:
         ''' conjugate '''
         return Quaternion(self.a, -self.b, -self.c, -self.d)
 
+    def norm(self):
+        return sqrt(self.a * self.a + self.b * self.b + self.c * self.c + self.d * self.d)
+
+    def normalize_(self):
+        r = self.norm()
+        self.a, self.b, self.c, self.d = self.a / r, self.b / r, self.c / r, self.d / r
+        return self
+
     def toVector(self):
         return Vector(self.b, self.c, self.d)
 
-class Cube(object):
-    def __init__(self, cube_center, canv, color):
-        self.canv = canv
-        self.color = color
-        e = EDGE_LENGTH / 2
-        self.points = [
-                cube_center,
-                Point( e / 2 + cube_center.x,  e / 2 + cube_center.y,  e / 2 + cube_center.z),
-                Point( e / 2 + cube_center.x,  e / 2 + cube_center.y, -e / 2 + cube_center.z),
-                Point( e / 2 + cube_center.x, -e / 2 + cube_center.y, -e / 2 + cube_center.z),
-                Point( e / 2 + cube_center.x, -e / 2 + cube_center.y,  e / 2 + cube_center.z),
-                Point(-e / 2 + cube_center.x, -e / 2 + cube_center.y,  e / 2 + cube_center.z),
-                Point(-e / 2 + cube_center.x, -e / 2 + cube_center.y, -e / 2 + cube_center.z),
-                Point(-e / 2 + cube_center.x,  e / 2 + cube_center.y, -e / 2 + cube_center.z),
-                Point(-e / 2 + cube_center.x,  e / 2 + cube_center.y,  e / 2 + cube_center.z)
-        ]
-
-        self.faces = [
-                Face(self.points[1], self.points[2], self.points[7], self.points[8]),
-                Face(self.points[1], self.points[8], self.points[5], self.points[4]),
-                Face(self.points[1], self.points[4], self.points[3], self.points[2]),
-                Face(self.points[6], self.points[5], self.points[8], self.points[7]),
-                Face(self.points[6], self.points[3], self.points[4], self.points[5]),
-                Face(self.points[6], self.points[7], self.points[2], self.points[3])              
-        ]
-
-        self.last_mouse_pos = None
-        self.update()
-
-    def update(self):
-        mouse_pos = self.canv.position
-        if mouse_pos is not None and self.last_mouse_pos is not None:
-            rot_dir = mouse_pos - self.last_mouse_pos  # type Vector2D
-            self.rotation_vector = Vector(-rot_dir.y, rot_dir.x, 0, norm=True)
-            self.rotation_angle = rot_dir.magnitude() * INPUT_SENSITIVITY
-
-            for point in self.points:
-                point.transform(self.rotation_vector, self.rotation_angle)
-        self.last_mouse_pos = mouse_pos
-        return self.points[0].z
-
-    def draw(self):
-        for face in self.faces:
-            face.draw(self.canv, self.points[0], self.color)
-            if face.face_normal_vector.y < 0:
-                face.drawShadow(self.canv, GROUND_DISTANCE)
-
+    def toMatrix(self):
+        ''' 3x3 rotation matrix equivalent to p -> q * p * q.conj(), for unit q '''
+        return quatToMatrix(tuple(self))
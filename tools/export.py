@@ -0,0 +1,78 @@
+import sys
+import threading
+from queue import Queue
+
+# Streaming frame export. The renderer puts frames into a bounded queue and
+# a writer thread drains it, so encoding and disk or pipe I/O overlap with
+# rendering the next frame. When the writer falls behind, put() blocks
+# once `depth` frames are waiting, which bounds memory to depth frames
+# however long the animation is.
+
+DONE = object()
+
+
+class FrameQueue(object):
+    '''
+    Calls write(index, frame) for every put frame, in order, on a writer
+    thread. An exception in write is raised again by the next put or by
+    close.
+    '''
+    def __init__(self, write, depth=8):
+        self.write = write
+        self.queue = Queue(maxsize=depth)
+        self.error = None
+        self.count = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is DONE:
+                return
+            if self.error is None:
+                # after an error, keep draining so put never blocks forever
+                try:
+                    self.write(*item)
+                except Exception as e:
+                    self.error = e
+
+    def put(self, frame):
+        self.check()
+        self.queue.put((self.count, frame))
+        self.count += 1
+
+    def check(self):
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        ''' wait for every queued frame to be written '''
+        self.queue.put(DONE)
+        self.thread.join()
+        self.check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RawWriter(object):
+    ''' raw (height, width, 4) BGRA frames back to back, e.g. for ffmpeg -f rawvideo '''
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout.buffer
+
+    def __call__(self, index, frame):
+        self.stream.write(frame.data)
+
+    def close(self):
+        self.stream.flush()
+
+
+def saveImage(bgra, path):
+    # Qt only for encoding, rendering doesn't need it
+    from PyQt5.QtGui import QImage
+    height, width = bgra.shape[:2]
+    QImage(bgra.data, width, height, 4 * width, QImage.Format_ARGB32).save(path)
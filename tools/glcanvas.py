@@ -0,0 +1,207 @@
+import numpy as np
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import (QColor, QMatrix4x4, QOffscreenSurface, QOpenGLBuffer, QOpenGLContext,
+                         QOpenGLShader, QOpenGLShaderProgram, QOpenGLVersionProfile,
+                         QSurfaceFormat)
+from PyQt5.QtWidgets import QOpenGLWidget
+
+from tools.components import Point2D
+from tools.input import DragInput
+
+# Retained OpenGL backend. The rest pose geometry of the scene is uploaded
+# once into a vertex and an index buffer; per frame only the rotation and
+# camera uniforms change, and the vertex shader does the transform,
+# projection and shading. Depth testing replaces sorting, and the shadow
+# silhouettes are the faces flattened onto the ground.
+
+GL_FLOAT = 0x1406
+GL_UNSIGNED_INT = 0x1405
+GL_TRIANGLES = 0x0004
+GL_DEPTH_TEST = 0x0B71
+GL_COLOR_BUFFER_BIT = 0x4000
+GL_DEPTH_BUFFER_BIT = 0x0100
+
+FAR_DISTANCE = 100000
+
+VERTEX_SHADER = '''
+#version 120
+attribute vec3 position;
+attribute vec3 center;  // of the face, flat shading
+attribute vec3 normal;
+attribute vec3 color;  // the hue at full value
+uniform mat4 rotation;
+uniform float vts, eye, width, height, near, far, ground;
+uniform float flatten;  // 1 for the shadow pass
+varying vec3 shade;
+
+void main() {
+    vec3 p = (rotation * vec4(position, 1.0)).xyz;
+    if (flatten > 0.5) {
+        p.y = ground;
+        shade = vec3(160.0, 160.0, 164.0) / 255.0;  // Qt.gray
+    } else {
+        vec3 c = (rotation * vec4(center, 1.0)).xyz;
+        float b = dot((rotation * vec4(normal, 0.0)).xyz, normalize(vec3(0.0, 0.0, eye) - c));
+        // same shades as the raster canvas, negative for faces turned away
+        shade = b > 0.0 ? color * (b * 200.0 + 55.0) / 255.0 : vec3(-1.0);
+    }
+    // the projection of the raster canvas, centered, with w the distance
+    // to the viewer so the near and far planes clip
+    float d = eye - p.z;
+    gl_Position = vec4(2.0 * vts * p.x / width, -2.0 * vts * p.y / height,
+                       (d * (far + near) - 2.0 * far * near) / (far - near), d);
+}
+'''
+
+FRAGMENT_SHADER = '''
+#version 120
+varying vec3 shade;
+
+void main() {
+    if (shade.r < 0.0)
+        discard;
+    gl_FragColor = vec4(shade, 1.0);
+}
+'''
+
+
+def glAvailable():
+    '''
+    True if a desktop OpenGL 2 or later context, which the #version 120
+    shaders need, can be made current, with the driver the
+    process started with: Mesa picks its rasterizer when it loads, so a
+    software fallback has to be asked for before the QApplication exists,
+    see the gl-software backend of app.py. Needs a QApplication.
+    '''
+    context = QOpenGLContext()
+    context.setFormat(QSurfaceFormat.defaultFormat())
+    if not context.create():
+        return False
+    surface = QOffscreenSurface()
+    surface.setFormat(context.format())
+    surface.create()
+    ok = context.makeCurrent(surface)
+    if ok:
+        context.doneCurrent()
+        ok = not context.isOpenGLES() and context.format().version() >= (2, 0)
+    # the probe shouldn't outlive the check
+    surface.destroy()
+    context.deleteLater()
+    return ok
+
+
+def meshArrays(scene):
+    '''
+    interleaved (4 F, 12) float32 vertices (position, face center, normal,
+    color) and (F, 6) uint32 indices of two triangles per face
+    '''
+    rest = np.asarray(scene.engine.rest, dtype=float)
+    faces = np.asarray(scene.faces)
+    corners = rest[faces]  # (F, 4, 3)
+    centers = (corners[:, 1] + corners[:, 3]) / 2
+    rgb = {}
+    for hue in set(scene.face_colors):
+        c = QColor.fromHsv(hue, 255, 255)
+        rgb[hue] = (c.redF(), c.greenF(), c.blueF())
+    colors = np.array([rgb[hue] for hue in scene.face_colors]).reshape(-1, 3)
+    vertices = np.empty((len(faces), 4, 12), dtype=np.float32)
+    vertices[..., 0:3] = corners
+    vertices[..., 3:6] = centers[:, None]
+    vertices[..., 6:9] = np.asarray(scene.engine.rest_normals)[:, None]
+    vertices[..., 9:12] = colors[:, None]
+    first = 4 * np.arange(len(faces), dtype=np.uint32)[:, None]
+    indices = first + np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)
+    return vertices.reshape(-1, 12), indices
+
+
+class GLCanvas(DragInput, QOpenGLWidget):
+    '''
+    Draws the scene with a headlight, every face at full detail and depth
+    testing: the scene's lighting, detail and visibility mode don't apply.
+    Emits failed with the shader log if the shaders don't link.
+    '''
+    interacted = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, width, height, viewer_to_screen, screen_to_center, ground, near):
+        super(GLCanvas, self).__init__()
+        self.width, self.height = width, height
+        self.vts, self.stc = viewer_to_screen, screen_to_center
+        self.center = Point2D(width // 2, height // 2)
+        self.rotation = None  # the front view, for picking
+        self.ground, self.near = ground, near
+        self.setFixedSize(width, height)
+        self.setupInput()
+        self.overlay = False  # the profiler overlay is drawn by the raster canvas only
+
+        self.scene = None
+        self.uploaded = None  # (scene, layout_version) in the buffers
+        self.program = None
+        self.vertex_buffer = self.index_buffer = None
+        self.count = 0
+
+    def render(self, scene):
+        self.scene = scene
+        self.update()
+
+    def pick(self, scene, x, y):
+        return scene.pick(self, x, y)
+
+    def initializeGL(self):
+        profile = QOpenGLVersionProfile()
+        profile.setVersion(2, 0)
+        self.gl = self.context().versionFunctions(profile)
+        self.gl.initializeOpenGLFunctions()
+        self.gl.glClearColor(1, 1, 1, 1)
+        self.program = QOpenGLShaderProgram(self)
+        self.program.addShaderFromSourceCode(QOpenGLShader.Vertex, VERTEX_SHADER)
+        self.program.addShaderFromSourceCode(QOpenGLShader.Fragment, FRAGMENT_SHADER)
+        if not self.program.link():
+            # not raised, Qt calls us and would abort
+            log, self.program = self.program.log(), None
+            self.failed.emit(log)
+            return
+        self.vertex_buffer = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
+        self.index_buffer = QOpenGLBuffer(QOpenGLBuffer.IndexBuffer)
+        self.vertex_buffer.create()
+        self.index_buffer.create()
+
+    def upload(self, scene):
+        vertices, indices = meshArrays(scene)
+        self.vertex_buffer.bind()
+        self.vertex_buffer.allocate(vertices.tobytes(), vertices.nbytes)
+        self.index_buffer.bind()
+        self.index_buffer.allocate(indices.tobytes(), indices.nbytes)
+        self.count = indices.size
+        self.uploaded = (scene, scene.layout_version)
+
+    def paintGL(self):
+        gl = self.gl
+        gl.glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        scene = self.scene
+        if self.program is None or scene is None or not len(scene.faces):
+            return
+        if self.uploaded != (scene, scene.layout_version):
+            self.upload(scene)
+        program = self.program
+        program.bind()
+        self.vertex_buffer.bind()
+        self.index_buffer.bind()
+        for offset, name in enumerate(['position', 'center', 'normal', 'color']):
+            program.enableAttributeArray(name)
+            program.setAttributeBuffer(name, GL_FLOAT, 12 * offset, 3, 48)
+        # the per-frame upload: a rotation and a few scalars
+        m = scene.transform.matrix()
+        program.setUniformValue('rotation', QMatrix4x4(*m[0], 0, *m[1], 0, *m[2], 0, 0, 0, 0, 1))
+        for name, value in [('vts', self.vts), ('eye', self.vts + self.stc),
+                            ('width', self.width), ('height', self.height), ('near', self.near),
+                            ('far', FAR_DISTANCE), ('ground', self.ground)]:
+            program.setUniformValue(name, float(value))
+        # shadows first, underneath everything
+        gl.glDisable(GL_DEPTH_TEST)
+        program.setUniformValue('flatten', 1.0)
+        gl.glDrawElements(GL_TRIANGLES, self.count, GL_UNSIGNED_INT, 0)
+        gl.glEnable(GL_DEPTH_TEST)
+        program.setUniformValue('flatten', 0.0)
+        gl.glDrawElements(GL_TRIANGLES, self.count, GL_UNSIGNED_INT, 0)
+        program.release()
@@ -0,0 +1,55 @@
+from collections import deque
+
+from tools.components import Point2D
+
+
+class DragInput(object):
+    '''
+    Mouse drag handling shared by the canvas widgets. Moves, releases and
+    clicks (a press and release without moving) are queued for the window
+    to take once per frame; the widget class provides the interacted
+    signal, emitted on every event.
+    '''
+    def setupInput(self):
+        self.pressed = False
+        self.position = None
+        self.moves = deque()  # (timestamp in ms, Vector2D delta) since the last frame
+        self.released = None  # timestamp in ms of a release not handled yet
+        self.dragged = False  # moved since the last press
+        self.clicked = None  # Point2D of a click not handled yet
+
+    def mousePressEvent(self, e):
+        self.pressed = True
+        self.dragged = False
+        self.position = Point2D(e.pos().x(), e.pos().y())
+        self.interacted.emit()
+
+    def mouseMoveEvent(self, e):
+        if self.pressed:
+            position = Point2D(e.pos().x(), e.pos().y())
+            self.moves.append((e.timestamp(), position - self.position))
+            self.position = position
+            self.dragged = True
+            self.interacted.emit()
+
+    def takeMoves(self):
+        ''' returns and clears the mouse deltas queued since the last call '''
+        moves = list(self.moves)
+        self.moves.clear()
+        return moves
+
+    def mouseReleaseEvent(self, e):
+        if not self.dragged:
+            self.clicked = self.position
+        self.pressed = False
+        self.position = None
+        self.released = e.timestamp()
+        self.interacted.emit()
+
+    def takeRelease(self):
+        released, self.released = self.released, None
+        return released
+
+    def takeClick(self):
+        clicked, self.clicked = self.clicked, None
+        return clicked
@@ -0,0 +1,97 @@
+import numpy as np
+
+# Lighting. A Lighting turns face normals into intensities in [0, 1], and
+# a ColorTable maps (hue, quantized intensity) to a color that is computed
+# once when the scene is built, so no colors are made while drawing. A
+# face of intensity i is drawn with value 55 + 200 i of its hue.
+
+MIN_VALUE, VALUE_RANGE = 55, 200
+
+
+class Headlight(object):
+    ''' a light at the viewer, the original shading: normal . direction to the viewer '''
+    def __init__(self, strength=1.0):
+        self.strength = strength
+
+    def intensity(self, normals, centers, eye):
+        to_viewer = eye - centers
+        to_viewer /= np.linalg.norm(to_viewer, axis=1)[:, None]
+        return self.strength * np.einsum('ij,ij->i', normals, to_viewer)
+
+
+class DirectionalLight(object):
+    ''' a light at infinity, direction points from the scene towards it '''
+    def __init__(self, direction, strength=1.0):
+        direction = np.asarray(direction, dtype=float)
+        self.direction = direction / np.linalg.norm(direction)
+        self.strength = strength
+
+    def intensity(self, normals, centers, eye):
+        return self.strength * (normals @ self.direction)
+
+
+class Lighting(object):
+    ''' ambient light plus the sum of the lights, lights default to a headlight '''
+    def __init__(self, lights=None, ambient=0.0):
+        self.lights = [Headlight()] if lights is None else lights
+        self.ambient = ambient
+
+    def intensity(self, normals, centers, eye):
+        '''
+        (F,) intensity in [0, 1] of faces with world space normals and
+        centers, seen from the world space point eye
+        '''
+        total = np.full(len(normals), float(self.ambient))
+        for light in self.lights:
+            # faces turned away from a light get nothing from it
+            total += np.maximum(light.intensity(normals, centers, eye), 0)
+        return np.clip(total, 0, 1)
+
+
+def hsvToBgra(hues, values):
+    '''
+    (..., 4) uint8 (b, g, r, a) of fully saturated hues in degrees at values
+    0 to 255, broadcast. Same arithmetic as QColor.fromHsv(hue, 255, value).
+    '''
+    hues, values = np.broadcast_arrays(np.asarray(hues) % 360, values)
+    h = hues * 100 / 6000
+    v = values * 0x101 / 65535
+    sector = h.astype(int)
+    f = h - sector
+    # t as Qt computes it, v * (1 - s (1 - f)), rounds differently from v * f
+    q, t, p = v * (1 - f), v * (1 - (1 - f)), np.zeros_like(v)
+    r = np.choose(sector, [v, q, p, p, t, v])
+    g = np.choose(sector, [t, v, v, q, p, p])
+    b = np.choose(sector, [p, p, t, v, v, q])
+    out = np.empty(hues.shape + (4,), dtype=np.uint8)
+    for i, channel in enumerate([b, g, r]):
+        # 16 bits per channel, then rounded down to 8 bits
+        out[..., i] = ((channel * 65535 + 0.5).astype(int) + 128) // 257
+    out[..., 3] = 255
+    return out
+
+
+class ColorTable(object):
+    '''
+    (b, g, r, a) of every hue of a scene at `levels` intensities, bgra[h, l]
+    for the h-th of hues and intensity l / (levels - 1).
+    '''
+    def __init__(self, hues, levels):
+        self.hues = sorted(set(hues))
+        self.levels = levels
+        self.index = {hue: i for i, hue in enumerate(self.hues)}
+        values = (np.arange(levels) * VALUE_RANGE / (levels - 1)).astype(int) + MIN_VALUE
+        self.bgra = hsvToBgra(np.array(self.hues)[:, None], values[None, :])
+
+    def indices(self, hues):
+        ''' row in bgra of every hue '''
+        return np.array([self.index[hue] for hue in hues], dtype=int)
+
+    def quantize(self, intensity, steps=None):
+        '''
+        level of every intensity. With fewer steps, the intensities are
+        first rounded to steps values, which pick a subset of the levels.
+        '''
+        steps = steps or self.levels
+        coarse = np.floor(np.clip(intensity, 0, 1) * (steps - 1) + 0.5)
+        return np.floor(coarse * (self.levels - 1) / (steps - 1) + 0.5).astype(int)
@@ -0,0 +1,76 @@
+# Adaptive frame pacing. The pacer measures what frames actually cost and
+# trades detail for speed when they don't fit the frame budget, one level
+# at a time, then restores it when there is headroom again.
+
+
+class Detail(object):
+    ''' how much of the scene is drawn '''
+    def __init__(self, shadows=True, shade_levels=64, flat_beyond=None):
+        self.shadows = shadows
+        self.shade_levels = shade_levels  # distinct brightness steps of a hue
+        # cubes with their center z below this are drawn as their single most
+        # visible face, None for none; z is relative to the scene center
+        self.flat_beyond = flat_beyond
+
+    def __repr__(self):
+        return 'Detail(shadows={}, shade_levels={}, flat_beyond={})'.format(
+            self.shadows, self.shade_levels, self.flat_beyond)
+
+
+# cheapest last
+DETAIL_LEVELS = [
+    Detail(),
+    Detail(shadows=False),
+    Detail(shadows=False, shade_levels=8),
+    Detail(shadows=False, shade_levels=8, flat_beyond=0),
+]
+
+
+class FramePacer(object):
+    '''
+    Keeps a moving average of the frame cost. After DEGRADE_AFTER frames
+    over budget it steps down a detail level, after RESTORE_AFTER frames
+    under HEADROOM of the budget it steps back up. The gap between the two
+    thresholds keeps it from flipping between levels every other frame.
+    '''
+    DEGRADE_AFTER = 5
+    RESTORE_AFTER = 30
+    HEADROOM = 0.5
+
+    def __init__(self, fps, levels=DETAIL_LEVELS, smoothing=0.2):
+        self.budget = 1 / fps
+        self.levels = levels
+        self.smoothing = smoothing
+        self.cost = None  # seconds
+        self.level = 0
+        self.over = self.under = 0
+
+    @property
+    def detail(self):
+        return self.levels[self.level]
+
+    def record(self, seconds):
+        ''' add the cost of a frame, returns True if the detail level changed '''
+        if self.cost is None:
+            self.cost = seconds
+        else:
+            self.cost += self.smoothing * (seconds - self.cost)
+        if self.cost > self.budget:
+            self.over, self.under = self.over + 1, 0
+            if self.over >= self.DEGRADE_AFTER and self.level < len(self.levels) - 1:
+                self.level += 1
+                self.over = 0
+                return True
+        elif self.cost < self.budget * self.HEADROOM:
+            self.over, self.under = 0, self.under + 1
+            if self.under >= self.RESTORE_AFTER and self.level > 0:
+                self.level -= 1
+                self.under = 0
+                return True
+        else:
+            self.over = self.under = 0
+        return False
+
+    def interval(self):
+        ''' seconds between frame starts: the budget, or the cost if it is over '''
+        return max(self.budget, self.cost or 0)
@@ -0,0 +1,88 @@
+import numpy as np
+
+# Picking: which face is under a screen point. The projected faces of a
+# frame are binned into a uniform grid of cell x cell pixel squares by
+# their bounding boxes, so a query only tests the few faces listed in one
+# cell instead of every face in the scene.
+
+
+def containing(quads, x, y):
+    ''' (k,) True for the convex (k, n, 2) polygons that contain (x, y) '''
+    edges = np.roll(quads, -1, axis=1) - quads
+    cross = edges[..., 0] * (y - quads[..., 1]) - edges[..., 1] * (x - quads[..., 0])
+    # inside is on the same side of every edge, whichever the winding
+    return (cross >= 0).all(axis=1) | (cross <= 0).all(axis=1)
+
+
+def distanceAt(pts, dist, x, y):
+    '''
+    distance to the viewer of the planar polygon pts (n, 2) at (x, y),
+    its corners at dist (n,). 1 / distance is linear in screen space.
+    '''
+    for i in range(1, len(pts) - 1):
+        (ax, ay), (bx, by), (cx, cy) = pts[0], pts[i], pts[i + 1]
+        area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+        if area == 0:
+            continue
+        w1 = ((x - ax) * (cy - ay) - (y - ay) * (cx - ax)) / area
+        w2 = ((bx - ax) * (y - ay) - (by - ay) * (x - ax)) / area
+        if w1 >= 0 and w2 >= 0 and w1 + w2 <= 1:
+            return 1 / ((1 - w1 - w2) / dist[0] + w1 / dist[i] + w2 / dist[i + 1])
+    return dist.mean()
+
+
+class PickGrid(object):
+    '''
+    Face rows of a frame binned by screen cell, in compressed rows: the
+    faces overlapping cell c are rows[starts[c]:starts[c + 1]].
+    '''
+    def __init__(self, width, height, cell=32):
+        self.cell = cell
+        self.nx, self.ny = -(-width // cell), -(-height // cell)
+        self.rows = np.empty(0, dtype=int)
+        self.starts = np.zeros(self.nx * self.ny + 1, dtype=int)
+        self.visible = None
+        self.eye = 0
+
+    def build(self, visible, eye):
+        ''' bin the faces in view of a tools.visibility.Visible '''
+        self.visible, self.eye = visible, eye
+        rows = np.flatnonzero(visible.mask)
+        # clipped faces are few, queries test them directly
+        rows = rows[~np.isin(rows, list(visible.clipped))]
+        quads = visible.quads[rows]
+        lo = np.floor(quads.min(axis=1) / self.cell).astype(int)
+        hi = np.floor(quads.max(axis=1) / self.cell).astype(int)
+        np.maximum(lo, 0, out=lo)
+        np.minimum(hi, (self.nx - 1, self.ny - 1), out=hi)
+        on_screen = (lo <= hi).all(axis=1)
+        rows, lo, hi = rows[on_screen], lo[on_screen], hi[on_screen]
+        # every face expands to the cells of its bounding box
+        spans = hi - lo + 1
+        counts = spans[:, 0] * spans[:, 1]
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = np.repeat(lo[:, 0], counts) + k % np.repeat(spans[:, 0], counts)
+        cy = np.repeat(lo[:, 1], counts) + k // np.repeat(spans[:, 0], counts)
+        cells = cy * self.nx + cx
+        order = np.argsort(cells, kind='stable')
+        self.rows = np.repeat(rows, counts)[order]
+        self.starts = np.searchsorted(cells[order], np.arange(self.nx * self.ny + 1))
+
+    def query(self, x, y):
+        ''' row of the front face at pixel (x, y), None if there is none '''
+        visible = self.visible
+        if visible is None:
+            return None
+        cx, cy = int(x // self.cell), int(y // self.cell)
+        rows = []
+        if 0 <= cx < self.nx and 0 <= cy < self.ny:
+            c = cy * self.nx + cx
+            rows = self.rows[self.starts[c]:self.starts[c + 1]]
+            rows = rows[containing(visible.quads[rows], x, y)].tolist()
+        rows += [f for f, (pts, z) in visible.clipped.items()
+                 if containing(pts[None], x, y)[0]]
+        if not rows:
+            return None
+        # the face closest to the viewer at that point
+        return min(rows, key=lambda f: distanceAt(visible.polygon(f)[0],
+                                                  self.eye - visible.polygon(f)[1], x, y))
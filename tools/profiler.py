@@ -0,0 +1,78 @@
+import time
+from collections import deque
+
+import numpy as np
+
+
+class Span(object):
+    ''' times a with-block and records it under name '''
+    def __init__(self, profiler, name):
+        self.profiler, self.name = profiler, name
+
+    def __enter__(self):
+        self.start = time.perf_counter()  # monotonic
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class NullSpan(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Profiler(object):
+    '''
+    Rolling per-stage frame timings. Keeps the last `window` durations of
+    every named span; while disabled, span() returns a shared no-op.
+    '''
+    def __init__(self, window=300, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self.samples = {}
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            # MultiView workers record concurrently, setdefault is atomic
+            # so two first samples end up in one deque
+            samples = self.samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def reset(self):
+        self.samples = {}
+
+    def histogram(self, name, bins=10):
+        ''' (counts, bin edges in ms) of the recorded durations of name '''
+        return np.histogram(np.array(self.samples.get(name, [])) * 1000, bins=bins)
+
+    def stats(self):
+        ''' {name: {count, mean, p50, p99, max}}, durations in ms '''
+        result = {}
+        for name, samples in self.samples.items():
+            ms = np.array(samples) * 1000
+            result[name] = {'count': len(ms),
+                            'mean': float(ms.mean()),
+                            'p50': float(np.percentile(ms, 50)),
+                            'p99': float(np.percentile(ms, 99)),
+                            'max': float(ms.max())}
+        return result
+
+
+# shared by the scene, the canvas and the window
+PROFILER = Profiler()
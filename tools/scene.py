@@ -0,0 +1,424 @@
+import os
+from math import sqrt
+
+import numpy as np
+
+from tools.components import Vector
+from tools.lighting import Lighting, DirectionalLight, ColorTable
+from tools.pacing import DETAIL_LEVELS
+from tools.picking import PickGrid
+from tools.profiler import PROFILER
+from tools.shadow import outline, silhouettes
+from tools import snapshot
+from tools.transform import RowBuffer, Transform, TransformEngine
+from tools.visibility import Visible, CubeOrder, inFrustum, clipNear
+
+# The scene and its geometry, with no Qt dependency: batch jobs import
+# this and numpy only. Canvases are duck-typed, anything with width,
+# height, vts, stc, center and the draw methods of tools.visual's
+# FrameRenderer can be drawn on.
+
+CANVAS_WIDTH = 1300
+CANVAS_HEIGHT = 650
+
+EDGE_LENGTH = 250
+VIEWER_TO_SCREEN = 2 * EDGE_LENGTH
+SCREEN_TO_CENTER = 2 * EDGE_LENGTH
+INPUT_SENSITIVITY = 0.01
+INTERSPACE = 20
+GROUND_DISTANCE = 100 + EDGE_LENGTH
+NEAR_DISTANCE = 10  # closest distance to the viewer that is still drawn
+
+EASE_MAX = 60
+SHADE_LEVELS = 64
+
+# the L key cycles through these, y points down and z towards the viewer
+LIGHTINGS = [
+    Lighting(),
+    # sun above, left and behind the viewer, and ambient light
+    Lighting([DirectionalLight((-1, -2, 1.5), 0.8)], ambient=0.2),
+]
+
+
+def toView(xyz, canv):
+    # (..., 3) world space points or directions seen by the camera of canv
+    if canv.rotation is None:
+        return xyz
+    return xyz @ canv.rotation.T
+
+
+def fromView(xyz, canv):
+    # (..., 3) view space points or directions of the camera of canv in world space
+    if canv.rotation is None:
+        return xyz
+    return xyz @ canv.rotation
+
+
+def project(xyz, canv):
+    # perspective projection of (..., 3) view space points to (..., 2) canvas points
+    ratio = canv.vts / (canv.vts + canv.stc - xyz[..., 2])
+    return xyz[..., :2] * ratio[..., None] + (canv.center.x, canv.center.y)
+
+
+# center followed by the corners of a cube of edge length 2
+CUBE_VERTICES = np.array([
+        ( 0,  0,  0),
+        ( 1,  1,  1),
+        ( 1,  1, -1),
+        ( 1, -1, -1),
+        ( 1, -1,  1),
+        (-1, -1,  1),
+        (-1, -1, -1),
+        (-1,  1, -1),
+        (-1,  1,  1)
+], dtype=float)
+
+# corner rows (into CUBE_VERTICES) of the six faces
+CUBE_FACES = np.array([
+        (1, 2, 7, 8),
+        (1, 8, 5, 4),
+        (1, 4, 3, 2),
+        (6, 5, 8, 7),
+        (6, 3, 4, 5),
+        (6, 7, 2, 3)
+])
+
+# outward unit normals of CUBE_FACES, in the rest pose
+CUBE_NORMALS = (CUBE_VERTICES[CUBE_FACES[:, 1]] + CUBE_VERTICES[CUBE_FACES[:, 3]]) / 2
+
+
+def cubeMesh(centers, edge_length):
+    '''
+    Indexed mesh of M cubes with the given (M, 3) centers: unique corner
+    vertices (V, 3), face indices into them (6 * M, 4), rest-pose face
+    normals (6 * M, 3) and the corner indices of every cube (M, 8).
+    '''
+    centers = np.asarray(centers, dtype=float).reshape(-1, 1, 3)
+    # half of edge_length / 2, the cube edge is edge_length / 2
+    corners = (centers + CUBE_VERTICES[1:] * edge_length / 4).reshape(-1, 3)
+    # coincident corners of touching cubes are stored once
+    vertices, inverse = np.unique(corners.round(6), axis=0, return_inverse=True)
+    cube_corners = inverse.reshape(-1, 8)
+    faces = cube_corners[:, CUBE_FACES - 1].reshape(-1, 4)
+    normals = np.tile(CUBE_NORMALS, (len(cube_corners), 1))
+    return vertices, faces, normals, cube_corners
+
+
+class Cube(object):
+    def __init__(self, center, first_face, corners, color, scene):
+        self.center = center  # row of the cube center in the engine's vertices
+        self.face_rows = slice(first_face, first_face + 6)  # rows of scene.faces
+        self.corners = corners  # rows of the 8 corners in the engine's vertices
+        self.color = color
+        self.scene = scene
+
+    def depth(self):
+        return self.scene.engine.vertices[self.center, 2]
+
+
+class Scene(object):
+    '''
+    The cubes and the transform they share, independent of any widget.
+    A frame goes through the stages update (transform), visibility, sort
+    and rasterize, see draw. Sorting and rasterizing are done by a
+    pluggable visibility mode, see tools.visibility. Canvases are also
+    cameras: their rotation, if not None, turns world space into view
+    space before projecting.
+    '''
+    def __init__(self, visibility_mode=None):
+        self.visibility_mode = visibility_mode or CubeOrder()
+        self.detail = DETAIL_LEVELS[0]
+        # scene graph root, shared by every cube
+        self.transform = Transform()
+        self.engine = TransformEngine(self.transform)
+        self.cubes = []
+        self.faces = np.empty((0, 4), dtype=int)  # rows of engine.vertices
+        self.face_colors = []  # hue of every face
+        self.lighting = LIGHTINGS[0]
+        self.colors = ColorTable([], SHADE_LEVELS)
+        self.face_hues = np.empty(0, dtype=int)  # row of every face in colors
+        self.center_rows = np.empty(0, dtype=int)  # cube centers in engine.vertices
+        self.corner_rows = np.empty((0, 8), dtype=int)  # cube corners in engine.vertices
+        self.cube_radius = np.empty(0)  # bounding sphere of every cube
+        self.layout_version = 0  # bumped when cubes are added
+        self.updated_layout = None  # layout_version of the last update
+        self.saved = None  # (path, layout_version) of the last save or load
+        self.visible = None  # (engine version, canvas, Visible) of the last visibility pass
+        self.picker = None  # (engine version, canvas, PickGrid)
+        self.face_centers = None  # (key, world space face centers), see faceCenters
+        self.shadow_polygons = None  # (key, world space shadows), see shadowPolygons
+        # adding cubes one by one stays linear in their number
+        self.buffers = {name: RowBuffer() for name in ['faces', 'face_hues', 'center_rows',
+                                                       'corner_rows', 'cube_radius']}
+
+    def add(self, center, color, edge_length=EDGE_LENGTH):
+        self.addMany([tuple(center)], [color], edge_length)
+
+    def addMany(self, centers, colors, edge_length=EDGE_LENGTH):
+        ''' add cubes for arrays of centers and hues in one go '''
+        centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+        vertices, faces, normals, corners = cubeMesh(centers, edge_length)
+        first_center = self.engine.add(centers)
+        first_vertex = self.engine.add(vertices)
+        first_face = self.engine.addNormals(normals)
+        self.append('faces', faces + first_vertex)
+        hues = [int(color) for color in colors for face in range(6)]
+        self.face_colors.extend(hues)
+        self.append('center_rows', first_center + np.arange(len(centers)))
+        # the cube edge is edge_length / 2
+        self.append('cube_radius', np.full(len(centers), edge_length / 4 * sqrt(3)))
+        corners = corners + first_vertex
+        self.append('corner_rows', corners)
+        self.cubes.extend(Cube(first_center + i, first_face + 6 * i, corners[i], color, self)
+                          for i, color in enumerate(colors))
+        self.layout_version += 1
+        if set(hues) <= self.colors.index.keys():
+            self.append('face_hues', self.colors.indices(hues))
+        else:
+            # a new hue reorders the table
+            self.buildColors()
+
+    def append(self, name, rows):
+        setattr(self, name, self.buffers[name].append(getattr(self, name), rows))
+
+    def buildColors(self):
+        ''' the color table of the scene's hues, lighting only picks levels from it '''
+        if set(self.face_colors) != set(self.colors.hues):
+            self.colors = ColorTable(self.face_colors, SHADE_LEVELS)
+        self.face_hues = self.colors.indices(self.face_colors)
+
+    def save(self, path):
+        '''
+        write a snapshot of the scene to path, see tools.snapshot. If the
+        cubes didn't change since the last save or load of path, only the
+        orientation is rewritten.
+        '''
+        orientation = self.transform.orientation
+        if self.saved == (path, self.layout_version):
+            snapshot.saveOrientation(path, orientation)
+            return
+        colors = [cube.color for cube in self.cubes]
+        snapshot.save(path, {'rest': self.engine.rest, 'normals': self.engine.rest_normals,
+                             'faces': self.faces, 'centers': self.center_rows,
+                             'corners': self.corner_rows, 'colors': colors,
+                             'radius': self.cube_radius}, orientation)
+        self.saved = (path, self.layout_version)
+
+    @classmethod
+    def load(cls, path, visibility_mode=None):
+        ''' scene of a snapshot, the geometry stays memory-mapped '''
+        arrays, orientation = snapshot.load(path)
+        scene = cls(visibility_mode)
+        scene.transform.setOrientation(orientation)
+        scene.engine.setRest(arrays['rest'], arrays['normals'])
+        scene.faces = arrays['faces']
+        scene.center_rows = arrays['centers']
+        scene.cube_radius = arrays['radius']
+        colors = arrays['colors'].astype(int).tolist()
+        scene.face_colors = np.repeat(colors, 6).tolist()
+        # the faces of cube m are rows 6 * m to 6 * m + 5
+        # plain ndarray rows, slicing a memmap makes a memmap per row
+        corners = np.asarray(arrays['corners'])
+        scene.corner_rows = corners
+        scene.cubes = [Cube(center, 6 * m, corners[m], color, scene) for m, (center, color)
+                       in enumerate(zip(scene.center_rows.tolist(), colors))]
+        scene.buildColors()
+        scene.saved = (path, scene.layout_version)
+        return scene
+
+    def rotate(self, rot_dir):
+        ''' rotate the scene for a drag of rot_dir (Vector2D) '''
+        rotation_vector = Vector(-rot_dir.y, rot_dir.x, 0, norm=True)
+        rotation_angle = rot_dir.magnitude() * INPUT_SENSITIVITY
+        if rotation_angle > 0:
+            self.transform.rotate(list(rotation_vector), rotation_angle)
+
+    def update(self):
+        ''' returns True if any cube moved '''
+        with PROFILER.span('update'):
+            # one batched transform for every cube
+            moved = self.engine.update()
+        # cubes added since the last update haven't been drawn yet
+        if self.updated_layout != self.layout_version:
+            self.updated_layout = self.layout_version
+            moved = True
+        return moved
+
+    def faceCenters(self):
+        '''
+        world space centers of the faces, the part of the visibility stage
+        that doesn't depend on the camera, done once per frame for all views
+        '''
+        key = (self.engine.version, self.layout_version)
+        if self.face_centers is None or self.face_centers[0] != key:
+            verts = self.engine.vertices
+            self.face_centers = (key, (verts[self.faces[:, 1]] + verts[self.faces[:, 3]]) / 2)
+        return self.face_centers[1]
+
+    def shadowPolygons(self):
+        '''
+        (M, k, 3) world space shadow of every cube on the ground, shared by
+        all views of a frame. The cubes share one orientation, so the same
+        corners outline all their shadows.
+        '''
+        key = (self.engine.version, self.layout_version)
+        if self.shadow_polygons is None or self.shadow_polygons[0] != key:
+            rows = outline(CUBE_VERTICES[1:] @ self.transform.matrix().T)
+            corners = self.engine.vertices[self.corner_rows]
+            self.shadow_polygons = (key, silhouettes(corners, rows, GROUND_DISTANCE))
+        return self.shadow_polygons[1]
+
+    def visibility(self, canv, remember=True):
+        '''
+        project every vertex and cull and shade every face for the camera of
+        canv, as arrays. With remember, picking reuses the result.
+        '''
+        with PROFILER.span('visibility'):
+            verts = toView(self.engine.vertices, canv)
+            normals = toView(self.engine.normals, canv)
+            face_centers = toView(self.faceCenters(), canv)
+            eye = canv.vts + canv.stc
+            detail = self.detail
+            # bounding spheres of the cubes and of their shadows against the frustum
+            centers = verts[self.center_rows]
+            cube_mask = inFrustum(centers, self.cube_radius, canv.vts, canv.stc,
+                                  canv.width, canv.height, NEAR_DISTANCE)
+            if detail.shadows:
+                # the ground is level in world space
+                ground = self.engine.vertices[self.center_rows]
+                ground[:, 1] = GROUND_DISTANCE
+                shadow_mask = inFrustum(toView(ground, canv), self.cube_radius, canv.vts,
+                                        canv.stc, canv.width, canv.height, NEAR_DISTANCE)
+            else:
+                shadow_mask = np.zeros(len(self.cubes), dtype=bool)
+            # every unique vertex is projected once, those behind the
+            # viewer are garbage but only used by clipped faces
+            with np.errstate(divide='ignore', invalid='ignore'):
+                projected = project(verts, canv)
+            to_viewer = np.array([0, 0, eye]) - face_centers
+            to_viewer /= np.linalg.norm(to_viewer, axis=1)[:, None]
+            facing = np.einsum('ij,ij->i', normals, to_viewer)
+            mask = (facing > 0) & np.repeat(cube_mask, 6)
+            if detail.flat_beyond is not None:
+                # distant cubes are drawn as their one most visible face,
+                # the 6 faces of a cube are consecutive rows
+                far = np.flatnonzero(centers[:, 2] < detail.flat_beyond)
+                best = facing.reshape(-1, 6)[far].argmax(axis=1)
+                cube_faces = mask.reshape(-1, 6)
+                kept = cube_faces[far, best]
+                cube_faces[far] = False
+                cube_faces[far, best] = kept
+            depths = verts[self.faces, 2]
+            # faces crossing the near plane are clipped to it
+            clipped = {}
+            z_near = eye - NEAR_DISTANCE
+            for f in np.flatnonzero(mask & (depths > z_near).any(axis=1)):
+                poly = clipNear(verts[self.faces[f]], z_near)
+                if len(poly) < 3:
+                    mask[f] = False
+                else:
+                    clipped[f] = (project(poly, canv), poly[:, 2])
+            shadows = [None] * len(self.cubes)
+            rows = np.flatnonzero(shadow_mask)
+            if len(rows):
+                polygons = project(toView(self.shadowPolygons()[rows], canv), canv)
+                for m, polygon in zip(rows.tolist(), polygons):
+                    shadows[m] = polygon
+            # the lights are fixed in the world, only a headlight follows the camera
+            brightness = self.lighting.intensity(self.engine.normals, self.faceCenters(),
+                                                 fromView(np.array([0, 0, eye]), canv))
+            levels = self.colors.quantize(brightness, detail.shade_levels)
+            visible = Visible(projected[self.faces], depths, mask, brightness, levels,
+                              shadows, cube_mask | shadow_mask, clipped, centers[:, 2])
+            if remember:
+                self.visible = (self.engine.version, canv, visible)
+            return visible
+
+    def pick(self, canv, x, y):
+        '''
+        (cube index, face row) at canvas pixel (x, y), None for the
+        background. The pick grid is rebuilt only after the scene moved,
+        from the last visibility pass if it is current.
+        '''
+        with PROFILER.span('pick'):
+            key = (self.engine.version, canv)
+            if self.picker is None or self.picker[:2] != key:
+                if self.visible is not None and self.visible[:2] == key:
+                    visible = self.visible[2]
+                else:
+                    visible = self.visibility(canv)
+                grid = PickGrid(canv.width, canv.height)
+                grid.build(visible, canv.vts + canv.stc)
+                self.picker = key + (grid,)
+            f = self.picker[2].query(x, y)
+        if f is None:
+            return None
+        # the 6 faces of a cube are consecutive rows
+        return int(f) // 6, int(f)
+
+    def sort(self, visible, mode=None):
+        ''' order of visible by mode, the scene's visibility mode by default '''
+        with PROFILER.span('sort'):
+            return (mode or self.visibility_mode).sort(self, visible)
+
+    def rasterize(self, canv, visible, order, mode=None):
+        with PROFILER.span('rasterize'):
+            canv.useColors(self.colors)
+            (mode or self.visibility_mode).rasterize(canv, self, visible, order)
+
+    def draw(self, canv):
+        canv.beginFrame()
+        visible = self.visibility(canv)
+        self.rasterize(canv, visible, self.sort(visible))
+        canv.endFrame()
+
+
+PALETTE = [0, 45, 90, 135, 180, 225, 270, 315]
+
+
+def gridScene(shape, edge_length=EDGE_LENGTH, interspace=INTERSPACE, palette=PALETTE):
+    '''
+    Scene of nx * ny * nz cubes centered on the origin. shape is either n
+    or (nx, ny, nz), cells are colored by cycling through the palette hues
+    in x, y, z order.
+    '''
+    if isinstance(shape, int):
+        shape = (shape, shape, shape)
+    spacing = edge_length / 2 + interspace
+    axes = [(np.arange(n) - (n - 1) / 2) * spacing for n in shape]
+    centers = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+    colors = np.resize(palette, len(centers)).tolist()
+    scene = Scene()
+    scene.addMany(centers, colors, edge_length)
+    return scene
+
+
+def defaultScene():
+    ''' the 2x2x2 cube '''
+    return gridScene(2, palette=[225, 180, 90, 315, 270, 45, 0, 135])
+
+
+def ease(t):
+    ''' drag speed over t = 0 .. EASE_MAX: rest, speed up, hold, slow down '''
+    t1, t2, t3, t4, t5, t6 = 10, 20, 30, 40, 50, EASE_MAX
+    max_val = 3
+    if t < t1:
+        val = 0
+    elif t < t2:
+        val = (max_val / 2 / (t2 - t1)**2) * (t - t1)**2
+    elif t < t3:
+        val = - (max_val / 2 / (t2 - t3)**2) * (t - t3)**2 + max_val
+    elif t < t4:
+        val = max_val
+    elif t < t5:
+        val = - (max_val / 2 / (t5 - t4)**2) * (t - t4)**2 + max_val
+    else:
+        val = (max_val / 2 / (t5 - t6)**2) * (t - t6)**2
+    return val
+
+
+def openScene(path):
+    ''' the snapshot at path if there is one, else the default scene '''
+    if path is not None and os.path.exists(path):
+        return Scene.load(path)
+    return defaultScene()
@@ -0,0 +1,37 @@
+def convexHull(points):
+    ''' indices of the convex hull of (n, 2) points, counter-clockwise '''
+    order = sorted(range(len(points)), key=lambda i: (points[i][0], points[i][1]))
+
+    def cross(o, a, b):
+        return ((points[a][0] - points[o][0]) * (points[b][1] - points[o][1]) -
+                (points[a][1] - points[o][1]) * (points[b][0] - points[o][0]))
+
+    lower, upper = [], []
+    for i in order:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], i) <= 0:
+            lower.pop()
+        lower.append(i)
+    for i in reversed(order):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], i) <= 0:
+            upper.pop()
+        upper.append(i)
+    return lower[:-1] + upper[:-1]
+
+
+def outline(corners):
+    '''
+    rows of the (n, 3) corners of a convex body on the outline of its
+    shadow cast straight down, counter-clockwise in x, z
+    '''
+    return convexHull(corners[:, ::2].tolist())
+
+
+def silhouettes(corners, rows, gnd):
+    '''
+    Shadows cast straight down onto the plane y = gnd of bodies with the
+    same outline rows, one (k, 3) polygon per body for (M, n, 3) corners.
+    For a cube this is the merged outline of all its downward faces.
+    '''
+    ground = corners[:, rows]
+    ground[..., 1] = gnd
+    return ground
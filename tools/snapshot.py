@@ -0,0 +1,98 @@
+import os
+import struct
+
+import numpy as np
+
+# Binary scene snapshots. A fixed size header is followed by the scene
+# arrays, each contiguous and 16-byte aligned, so a snapshot loads as
+# read-only numpy.memmap views without parsing or copying anything:
+#
+#   magic, format version, orientation (4 float64), row count per array
+#   rest        float32 (V, 3)   rest pose of the centers and corners
+#   normals     float32 (F, 3)   rest pose face normals
+#   faces       int32   (F, 4)   rows of rest
+#   centers     int32   (M,)     rows of rest, one per cube
+#   corners     int32   (M, 8)   rows of rest, per cube
+#   colors      float32 (M,)     hue per cube
+#   radius      float32 (M,)     bounding sphere radius per cube
+#
+# The orientation is kept as float64 so that a resumed session continues
+# from exactly the same rotation.
+
+MAGIC = b'CUBESNAP'
+VERSION = 1
+ARRAYS = [
+    ('rest', np.float32, (3,)),
+    ('normals', np.float32, (3,)),
+    ('faces', np.int32, (4,)),
+    ('centers', np.int32, ()),
+    ('corners', np.int32, (8,)),
+    ('colors', np.float32, ()),
+    ('radius', np.float32, ()),
+]
+HEADER = struct.Struct('<8sI4d{}Q'.format(len(ARRAYS)))
+ORIENTATION_OFFSET = struct.calcsize('<8sI')
+ALIGN = 16
+
+
+def aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def layout(counts):
+    ''' (name, dtype, shape, byte offset) of every array for the given row counts '''
+    offset = aligned(HEADER.size)
+    out = []
+    for (name, dtype, row), count in zip(ARRAYS, counts):
+        shape = (count,) + row
+        out.append((name, dtype, shape, offset))
+        offset = aligned(offset + int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    return out
+
+
+def save(path, arrays, orientation):
+    '''
+    write a whole snapshot, arrays maps the names in ARRAYS to arrays. The
+    file is written next to path and then renamed over it: the arrays may
+    be memory maps of path itself, which keep reading the old file.
+    '''
+    counts = [len(arrays[name]) for name, dtype, row in ARRAYS]
+    partial = path + '.partial'
+    try:
+        with open(partial, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, *orientation, *counts))
+            for name, dtype, shape, offset in layout(counts):
+                f.seek(offset)
+                f.write(np.ascontiguousarray(arrays[name], dtype=dtype).reshape(shape).data)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def saveOrientation(path, orientation):
+    ''' overwrite just the orientation of an existing snapshot '''
+    with open(path, 'r+b') as f:
+        f.seek(ORIENTATION_OFFSET)
+        f.write(struct.pack('<4d', *orientation))
+
+
+def load(path):
+    ''' (arrays, orientation) of a snapshot, arrays are read-only memory maps '''
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+        raise ValueError("{} is not a scene snapshot".format(path))
+    magic, version, *rest = HEADER.unpack(header)
+    if version != VERSION:
+        raise ValueError("{}: unsupported snapshot version {}".format(path, version))
+    orientation, counts = rest[:4], rest[4:]
+    arrays = {}
+    for name, dtype, shape, offset in layout(counts):
+        if shape[0] == 0:
+            # numpy can't map zero bytes
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+    return arrays, np.array(orientation)
@@ -0,0 +1,164 @@
+import os
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from tools.components import Point2D
+from tools.visibility import ZBuffer
+
+# Offline tile renderer. The frame is split into tiles, every polygon is
+# assigned to the tiles its bounding box overlaps, and the tiles are
+# filled in parallel by a process pool writing straight into one shared
+# memory image. Polygons are painted in the given order (painter's
+# algorithm), so pass them back to front. A RecordingCanvas collects the
+# polygons of a frame, without Qt.
+
+SHADOW_BGRA = (164, 160, 160, 255)  # Qt.gray
+
+
+def fillConvex(image, pts, bgra):
+    ''' fill the convex polygon pts (n, 2) into image, (h, w, 4) at the origin '''
+    height, width = image.shape[:2]
+    x0, y0 = np.maximum(np.floor(pts.min(axis=0)).astype(int), 0)
+    x1, y1 = np.minimum(np.ceil(pts.max(axis=0)).astype(int), (width - 1, height - 1))
+    if x0 > x1 or y0 > y1:
+        return
+    x, y = pts[:, 0], pts[:, 1]
+    area = (x * np.roll(y, -1) - np.roll(x, -1) * y).sum()
+    if abs(area) < 1e-9:
+        return
+    xs = np.arange(x0, x1 + 1) + 0.5
+    ys = (np.arange(y0, y1 + 1) + 0.5)[:, None]
+    inside = np.ones((y1 - y0 + 1, x1 - x0 + 1), dtype=bool)
+    for i in range(len(pts)):
+        (ax, ay), (bx, by) = pts[i], pts[(i + 1) % len(pts)]
+        inside &= ((bx - ax) * (ys - ay) - (by - ay) * (xs - ax)) * area >= 0
+    image[y0:y1 + 1, x0:x1 + 1][inside] = bgra
+
+
+def attach(name, shape, dtype, offset):
+    shm = SharedMemory(name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+
+
+def renderTile(task):
+    ''' worker: fill the polygons listed for one tile into the shared image '''
+    (image_name, width, height), (input_name, count, size), (x0, y0, x1, y1), rows = task
+    image_shm, image = attach(image_name, (height, width, 4), np.uint8, 0)
+    input_shm, points = attach(input_name, (count, size, 2), np.float64, 0)
+    counts = np.ndarray((count,), dtype=np.int64, buffer=input_shm.buf, offset=points.nbytes)
+    colors = np.ndarray((count, 4), dtype=np.uint8, buffer=input_shm.buf,
+                        offset=points.nbytes + counts.nbytes)
+    tile = image[y0:y1, x0:x1]
+    for p in rows:
+        # tile local coordinates
+        fillConvex(tile, points[p, :counts[p]] - (x0, y0), colors[p])
+    del tile, image, points, counts, colors
+    image_shm.close()
+    input_shm.close()
+
+
+class TileRenderer(object):
+    '''
+    Renders lists of convex polygons into a width x height BGRA image with
+    a pool of worker processes, tile x tile pixels per task.
+    '''
+    def __init__(self, width, height, tile=256, workers=None):
+        self.width, self.height, self.tile = width, height, tile
+        # created before the pool, so the workers share our resource tracker
+        self.image_shm = SharedMemory(create=True, size=width * height * 4)
+        self.pool = Pool(workers or os.cpu_count())
+        self.image = np.ndarray((height, width, 4), dtype=np.uint8, buffer=self.image_shm.buf)
+        self.tiles = [(x, y, min(x + tile, width), min(y + tile, height))
+                      for y in range(0, height, tile) for x in range(0, width, tile)]
+
+    def render(self, polygons, colors, background=(255, 255, 255, 255)):
+        '''
+        polygons: list of (n, 2) pixel coordinates, back to front
+        colors: (b, g, r, a) of every polygon
+        returns a copy of the composited (height, width, 4) image
+        '''
+        self.image[:] = background
+        if not polygons:
+            return self.image.copy()
+        count, size = len(polygons), max(len(pts) for pts in polygons)
+        points = np.zeros((count, size, 2))
+        counts = np.array([len(pts) for pts in polygons], dtype=np.int64)
+        for p, pts in enumerate(polygons):
+            points[p, :len(pts)] = pts
+        input_shm = SharedMemory(create=True, size=points.nbytes + counts.nbytes + count * 4)
+        try:
+            buf = input_shm.buf
+            np.ndarray(points.shape, np.float64, buf, 0)[:] = points
+            np.ndarray(counts.shape, np.int64, buf, points.nbytes)[:] = counts
+            np.ndarray((count, 4), np.uint8, buf, points.nbytes + counts.nbytes)[:] = colors
+            # assign polygons to the tiles their bounding boxes overlap
+            lo = np.array([pts.min(axis=0) for pts in polygons])
+            hi = np.array([pts.max(axis=0) for pts in polygons])
+            tasks = []
+            for x0, y0, x1, y1 in self.tiles:
+                rows = np.flatnonzero((lo[:, 0] < x1) & (hi[:, 0] >= x0) &
+                                      (lo[:, 1] < y1) & (hi[:, 1] >= y0))
+                if len(rows):
+                    tasks.append(((self.image_shm.name, self.width, self.height),
+                                  (input_shm.name, count, size), (x0, y0, x1, y1), rows))
+            self.pool.map(renderTile, tasks)
+        finally:
+            input_shm.close()
+            input_shm.unlink()
+        return self.image.copy()
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        del self.image
+        self.image_shm.close()
+        self.image_shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingCanvas(object):
+    '''
+    Records the polygons and colors of a frame instead of painting them,
+    scaled to an output resolution, for the tile renderer.
+    '''
+    def __init__(self, width, height, viewer_to_screen, screen_to_center, scale=1):
+        self.width, self.height = width, height
+        self.vts, self.stc = viewer_to_screen, screen_to_center
+        # not rounded, the canvas is scaled to the output
+        self.center = Point2D(width / 2, height / 2)
+        self.rotation = None
+        self.scale = scale
+        self.bgra = None
+        self.polygons, self.colors = [], []
+
+    def render(self, scene):
+        if isinstance(scene.visibility_mode, ZBuffer):
+            raise ValueError("the z-buffer draws a raster, record with a painter's algorithm "
+                             "visibility mode")
+        scene.draw(self)
+
+    def beginFrame(self):
+        self.polygons, self.colors = [], []
+
+    def endFrame(self):
+        pass
+
+    def useColors(self, table):
+        self.bgra = table.bgra
+
+    def drawPolygon(self, points, bgra):
+        self.polygons.append(np.array(points, dtype=float) * self.scale)
+        self.colors.append(tuple(bgra))
+
+    def drawShaded(self, points, hue, level):
+        self.drawPolygon(points, self.bgra[hue, level].tolist())
+
+    def drawShadow(self, points):
+        self.drawPolygon(points, SHADOW_BGRA)
@@ -0,0 +1,155 @@
+from math import cos, sin
+
+import numpy as np
+
+
+def quatMul(q, r):
+    ''' hamilton product of two quaternions given as (a, b, c, d) '''
+    a, b, c, d = q
+    a_, b_, c_, d_ = r
+    return np.array([a*a_ - b*b_ - c*c_ - d*d_,
+                     a*b_ + b*a_ + c*d_ - d*c_,
+                     a*c_ - b*d_ + c*a_ + d*b_,
+                     a*d_ + b*c_ - c*b_ + d*a_])
+
+
+def quatToMatrix(q):
+    ''' 3x3 rotation matrix equivalent to p -> q * p * q.conj() '''
+    a, b, c, d = q
+    return np.array([
+        [1 - 2*(c*c + d*d), 2*(b*c - a*d), 2*(b*d + a*c)],
+        [2*(b*c + a*d), 1 - 2*(b*b + d*d), 2*(c*d - a*b)],
+        [2*(b*d - a*c), 2*(c*d + a*b), 1 - 2*(b*b + c*c)]])
+
+
+def slerp(q, r, t):
+    ''' spherical interpolation from unit quaternion q (t = 0) to r (t = 1) '''
+    q, r = np.asarray(q, dtype=float), np.asarray(r, dtype=float)
+    dot = np.dot(q, r)
+    if dot < 0:
+        # q and -q are the same rotation, take the short way round
+        r, dot = -r, -dot
+    if dot > 0.9995:
+        out = q + t * (r - q)
+    else:
+        th = np.arccos(dot)
+        out = (np.sin((1 - t) * th) * q + np.sin(t * th) * r) / np.sin(th)
+    return out / np.linalg.norm(out)
+
+
+class Transform(object):
+    '''
+    Scene graph node holding the accumulated rotation shared by every cube.
+    Incremental rotations are composed once per input event and the
+    quaternion is renormalized every RENORMALIZE_EVERY compositions so that
+    floating point drift does not turn it into a scaling.
+    '''
+    RENORMALIZE_EVERY = 64
+
+    def __init__(self):
+        self.orientation = np.array([1.0, 0.0, 0.0, 0.0])
+        self.version = 0  # bumped on every change, lets dependants detect it
+        self._since_normalize = 0
+        self._matrix = np.eye(3)
+
+    def rotate(self, v, th):
+        # rotating about v (unit vector) by angle th
+        s = sin(th / 2)
+        self.orientation = quatMul((cos(th / 2), v[0] * s, v[1] * s, v[2] * s), self.orientation)
+        self._since_normalize += 1
+        if self._since_normalize >= self.RENORMALIZE_EVERY:
+            # one newton step towards unit length, no square root: the norm
+            # is within rounding error of 1, where this is as good as dividing
+            q = self.orientation
+            q *= (3 - q @ q) / 2
+            self._since_normalize = 0
+        self._matrix = None
+        self.version += 1
+
+    def setOrientation(self, q):
+        ''' jump to the absolute orientation q, a unit quaternion '''
+        self.orientation = np.array(q, dtype=float) / np.linalg.norm(q)
+        self._since_normalize = 0
+        self._matrix = None
+        self.version += 1
+
+    def matrix(self):
+        # computed once, however many rotations were composed since
+        if self._matrix is None:
+            self._matrix = quatToMatrix(self.orientation)
+        return self._matrix
+
+
+class RowBuffer(object):
+    '''
+    Appends rows to an array in amortized constant time per row: the array
+    is a view of the first rows of a buffer that doubles when it is full.
+    '''
+    def __init__(self):
+        self.buffer = None
+
+    def append(self, array, rows):
+        ''' array followed by rows, the array must be the one last returned to grow in place '''
+        n, k = len(array), len(rows)
+        if self.buffer is None or array.base is not self.buffer or len(self.buffer) < n + k:
+            # a new array, e.g. a loaded one, is copied in once
+            self.buffer = np.empty((max(2 * (n + k), 16),) + array.shape[1:], dtype=array.dtype)
+            self.buffer[:n] = array
+        self.buffer[n:n + k] = rows
+        return self.buffer[:n + k]
+
+
+class TransformEngine(object):
+    '''
+    Holds the vertices of every cube in one (N, 3) array and the face
+    normals in another. The rotation of the shared Transform node is applied
+    to the whole scene with one matrix multiply per array instead of one
+    quaternion product per point.
+    '''
+    def __init__(self, transform):
+        self.transform = transform
+        self.rest = np.empty((0, 3))  # default, reference values (non-transformed)
+        self.vertices = np.empty((0, 3))  # transformed values
+        self.rest_normals = np.empty((0, 3))
+        self.normals = np.empty((0, 3))
+        self.version = transform.version
+        self.buffers = {name: RowBuffer() for name in ['rest', 'vertices', 'rest_normals',
+                                                       'normals']}
+
+    def append(self, name, rows):
+        setattr(self, name, self.buffers[name].append(getattr(self, name), rows))
+
+    def add(self, points):
+        ''' register rest positions, returns the index of the first one '''
+        start = len(self.rest)
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.append('rest', points)
+        # only the new rows are transformed
+        self.append('vertices', points @ self.transform.matrix().T)
+        return start
+
+    def addNormals(self, normals):
+        ''' register rest-pose normals, returns the index of the first one '''
+        start = len(self.rest_normals)
+        normals = np.asarray(normals, dtype=float).reshape(-1, 3)
+        self.append('rest_normals', normals)
+        self.append('normals', normals @ self.transform.matrix().T)
+        return start
+
+    def setRest(self, rest, normals):
+        ''' adopt rest pose arrays as they are, e.g. memory-mapped, without copying '''
+        self.rest, self.rest_normals = rest, normals
+        matrix = self.transform.matrix().T
+        self.vertices = np.asarray(rest, dtype=float) @ matrix
+        self.normals = np.asarray(normals, dtype=float) @ matrix
+        self.version = self.transform.version
+
+    def update(self):
+        ''' re-apply the transform if it changed, returns True if it did '''
+        if self.version == self.transform.version:
+            return False
+        matrix = self.transform.matrix().T
+        np.matmul(self.rest, matrix, out=self.vertices)
+        np.matmul(self.rest_normals, matrix, out=self.normals)
+        self.version = self.transform.version
+        return True
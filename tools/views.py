@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from math import cos, sin, pi
+
+import numpy as np
+
+# Multi-view rendering. Several cameras look at one scene: the transform,
+# the face centers and the shadow outlines are computed once per frame in
+# world space (Scene.update, Scene.faceCenters, Scene.shadowPolygons), and
+# every view only turns them into its own view space, culls, shades,
+# sorts and draws, on a worker thread and into a canvas of its own.
+
+# cameras this far away see the scene nearly orthographically, a 200 unit
+# deep scene changes size by 0.1% front to back
+ORTHO_DISTANCE = 100000
+
+
+def rotationX(angle):
+    c, s = cos(angle), sin(angle)
+    return np.array([(1, 0, 0), (0, c, -s), (0, s, c)])
+
+
+def rotationY(angle):
+    c, s = cos(angle), sin(angle)
+    return np.array([(c, 0, s), (0, 1, 0), (-s, 0, c)])
+
+
+# world to view space of the standard views, y points down and z towards
+# the front viewer: the top view looks down from -y, the side view in
+# from +x, the perspective view from above, right and in front
+CAMERAS = [
+    ('front', np.eye(3), True),
+    ('top', rotationX(-pi / 2), True),
+    ('side', rotationY(-pi / 2), True),
+    ('perspective', rotationX(-0.4) @ rotationY(-0.6), False),
+]
+
+
+def cameras(viewer_to_screen, screen_to_center):
+    '''
+    (name, rotation, viewer_to_screen, screen_to_center) of CAMERAS. The
+    orthographic ones keep the scale of the given camera at z = 0.
+    '''
+    out = []
+    for name, rotation, ortho in CAMERAS:
+        if ortho:
+            k = ORTHO_DISTANCE / screen_to_center
+            out.append((name, rotation, viewer_to_screen * k, ORTHO_DISTANCE))
+        else:
+            out.append((name, rotation, viewer_to_screen, screen_to_center))
+    return out
+
+
+class View(object):
+    '''
+    A camera onto a scene, drawn on canvas, whose rotation is the camera's.
+    Has its own instance of the scene's visibility mode, so the sorting
+    and z-buffer state of views don't mix, and keeps its last Visible and
+    order while the scene, its lighting and detail don't change.
+    '''
+    def __init__(self, name, canvas):
+        self.name = name
+        self.canvas = canvas
+        self.visibility_mode = None
+        self.key = None  # scene state of visible
+        self.visible = None
+        self.order = None  # of visible, by visibility_mode
+
+    def render(self, scene):
+        canv = self.canvas
+        key = (scene, scene.engine.version, scene.layout_version, scene.lighting, scene.detail)
+        if key != self.key:
+            # the scene remembers the visibility of its own canvas only
+            self.visible = scene.visibility(canv, remember=False)
+            self.key, self.order = key, None
+        if type(self.visibility_mode) is not type(scene.visibility_mode):
+            self.visibility_mode = type(scene.visibility_mode)()
+            self.order = None
+        if self.order is None:
+            self.order = scene.sort(self.visible, self.visibility_mode)
+        canv.beginFrame()
+        scene.rasterize(canv, self.visible, self.order, self.visibility_mode)
+        canv.endFrame()
+
+
+class MultiView(object):
+    ''' renders views of one scene in parallel, one worker thread per view by default '''
+    def __init__(self, views, workers=None):
+        self.views = views
+        self.pool = ThreadPoolExecutor(workers or len(views))
+
+    def render(self, scene):
+        # the shared pass, before the views need it, so no worker computes
+        # or caches it in the scene
+        scene.faceCenters()
+        if scene.detail.shadows:
+            scene.shadowPolygons()
+        # list() raises the first exception of a view
+        list(self.pool.map(lambda view: view.render(scene), self.views))
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
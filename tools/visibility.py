@@ -0,0 +1,151 @@
+import numpy as np
+
+# Visibility modes. Each one takes the Visible result of Scene.visibility,
+# orders the faces to draw in sort() and paints them onto a canvas in
+# rasterize().
+
+
+class Visible(object):
+    ''' output of the visibility stage, indexed by the scene's face rows '''
+    def __init__(self, quads, depths, mask, brightness, levels, shadows, cube_mask, clipped,
+                 center_depths):
+        self.quads = quads  # (F, 4, 2) projected corners
+        self.depths = depths  # (F, 4) corner z, larger is closer to the viewer
+        self.mask = mask  # (F,) True for faces in view, turned towards the viewer
+        self.brightness = brightness  # (F,) light intensity in [0, 1]
+        self.levels = levels  # (F,) brightness quantized to a scene.colors level
+        self.shadows = shadows  # projected polygon per cube, None if off-screen
+        self.cube_mask = cube_mask  # (M,) cubes with anything to draw
+        self.clipped = clipped  # {face row: (points, z)} cut at the near plane
+        self.center_depths = center_depths  # (M,) z of the cube centers
+
+    def polygon(self, f):
+        ''' projected points and z of face row f '''
+        if f in self.clipped:
+            return self.clipped[f]
+        return self.quads[f], self.depths[f]
+
+
+def inFrustum(centers, radius, vts, stc, width, height, near):
+    '''
+    (M,) True for the spheres that are at least partly in front of the near
+    plane and inside the width x height screen, viewer at z = vts + stc
+    '''
+    eye = vts + stc
+    x, y, z = centers.T
+    inside = z - radius < eye - near
+    for half, coord in ((width / 2, x), (height / 2, y)):
+        # signed distance to the side planes through the viewer
+        norm = np.hypot(vts, half)
+        for sign in (1, -1):
+            inside &= (sign * vts * coord + half * (z - eye)) / norm <= radius
+    return inside
+
+
+def clipNear(xyz, z_max):
+    ''' clip a (n, 3) polygon to z <= z_max, Sutherland-Hodgman '''
+    out = []
+    for i in range(len(xyz)):
+        a, b = xyz[i - 1], xyz[i]
+        a_in, b_in = a[2] <= z_max, b[2] <= z_max
+        if a_in != b_in:
+            out.append(a + (z_max - a[2]) / (b[2] - a[2]) * (b - a))
+        if b_in:
+            out.append(b)
+    return np.array(out).reshape(-1, 3)
+
+
+class CubeOrder(object):
+    ''' painter's algorithm over whole cubes, by the depth of their centers '''
+    def sort(self, scene, visible):
+        rows = np.flatnonzero(visible.cube_mask)
+        return rows[np.argsort(visible.center_depths[rows], kind='stable')]
+
+    def rasterize(self, canv, scene, visible, order):
+        mask, levels, hues = visible.mask, visible.levels, scene.face_hues
+        for m in order:
+            if visible.shadows[m] is not None:
+                canv.drawShadow(visible.shadows[m])
+            rows = scene.cubes[m].face_rows
+            for f in range(rows.start, rows.stop):
+                if mask[f]:
+                    canv.drawShaded(visible.polygon(f)[0], hues[f], levels[f])
+
+
+class FaceOrder(object):
+    '''
+    painter's algorithm over single faces: one argsort of the mean depth of
+    every visible face in the scene, correct for overlapping or non-grid
+    layouts where whole cubes can't be ordered
+    '''
+    def sort(self, scene, visible):
+        rows = np.flatnonzero(visible.mask)
+        return rows[np.argsort(visible.depths[rows].mean(axis=1), kind='stable')]
+
+    def rasterize(self, canv, scene, visible, order):
+        # shadows lie on the ground, behind everything
+        for shadow in visible.shadows:
+            if shadow is not None:
+                canv.drawShadow(shadow)
+        levels, hues = visible.levels, scene.face_hues
+        for f in order:
+            canv.drawShaded(visible.polygon(f)[0], hues[f], levels[f])
+
+
+class ZBuffer(object):
+    '''
+    software z-buffer: faces are split into triangles and rasterized into a
+    numpy color and depth buffer, no ordering needed. The buffer holds
+    1 / distance to the viewer, which unlike z is linear in screen space.
+    '''
+    def __init__(self):
+        self.colors = None  # (height, width, 4) BGRA, alpha 0 where empty
+        self.depths = None  # 1 / distance to the viewer, larger is closer
+
+    def sort(self, scene, visible):
+        return np.flatnonzero(visible.mask)
+
+    def rasterize(self, canv, scene, visible, order):
+        if self.colors is None or self.colors.shape[:2] != (canv.height, canv.width):
+            self.colors = np.zeros((canv.height, canv.width, 4), dtype=np.uint8)
+            self.depths = np.empty((canv.height, canv.width))
+        self.colors[:] = 0
+        self.depths[:] = 0  # infinitely far
+        eye = canv.vts + canv.stc
+        for shadow in visible.shadows:
+            if shadow is not None:
+                canv.drawShadow(shadow)
+        bgra_table, levels, hues = scene.colors.bgra, visible.levels, scene.face_hues
+        for f in order:
+            pts, z = visible.polygon(f)
+            bgra = bgra_table[hues[f], levels[f]]
+            # triangle fan, faces are convex
+            for i in range(1, len(pts) - 1):
+                self.triangle(pts[[0, i, i + 1]], 1 / (eye - z[[0, i, i + 1]]), bgra)
+        canv.drawRaster(self.colors)
+
+    def triangle(self, pts, inverse, bgra):
+        ''' fill where the triangle is closer, inverse is 1 / distance of its corners '''
+        height, width = self.depths.shape
+        x0, y0 = np.maximum(np.floor(pts.min(axis=0)).astype(int), 0)
+        x1, y1 = np.minimum(np.ceil(pts.max(axis=0)).astype(int), (width - 1, height - 1))
+        if x0 > x1 or y0 > y1:
+            return
+        (ax, ay), (bx, by), (cx, cy) = pts
+        area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+        if abs(area) < 1e-9:
+            return
+        # barycentric weights of the pixel centers in the bounding box
+        xs = np.arange(x0, x1 + 1) + 0.5
+        ys = (np.arange(y0, y1 + 1) + 0.5)[:, None]
+        w0 = ((bx - xs) * (cy - ys) - (by - ys) * (cx - xs)) / area
+        w1 = ((cx - xs) * (ay - ys) - (cy - ys) * (ax - xs)) / area
+        w2 = 1 - w0 - w1
+        depth = w0 * inverse[0] + w1 * inverse[1] + w2 * inverse[2]
+        region = self.depths[y0:y1 + 1, x0:x1 + 1]
+        closer = (w0 >= 0) & (w1 >= 0) & (w2 >= 0) & (depth > region)
+        region[closer] = depth[closer]
+        self.colors[y0:y1 + 1, x0:x1 + 1][closer] = bgra
+
+
+VISIBILITY_MODES = {'cubes': CubeOrder, 'faces': FaceOrder, 'zbuffer': ZBuffer}
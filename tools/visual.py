@@ -1,111 +1,361 @@
-from PyQt5.QtWidgets import QLabel
-# TODO: from components import 
+import sys
+import time
 
+import numpy as np
+from PyQt5.QtCore import QRectF, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor, QFont, QIcon, QImage, QPainter, QPen, QPixmap, QPolygonF
+from PyQt5.QtWidgets import QLabel, QMainWindow
 
-class Canvas(QLabel):
-    def __init__(self, width, height, viewer_to_screen, screen_to_center):
-        super(Canvas, self).__init__()
+from tools.animation import EaseTable, Animator
+from tools.components import Vector2D, Point2D
+from tools.input import DragInput
+from tools.pacing import FramePacer
+from tools.profiler import PROFILER
+from tools.scene import (CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER,
+                         GROUND_DISTANCE, NEAR_DISTANCE, EASE_MAX, LIGHTINGS,
+                         ease, openScene)
+from tools.views import View, MultiView, cameras
+from tools.visibility import VISIBILITY_MODES
+
+# The Qt side: canvases that paint a tools.scene.Scene and the window.
+# Importing this loads PyQt5, which the scene itself never does.
+
+WINDOW_X, WINDOW_Y = 20, 50
+FPS = 30
+
+
+class FrameRenderer(object):
+    '''
+    Frame-level render pass shared by the on-screen and offscreen canvases:
+    one painter per frame, a brush per color table entry and preallocated
+    polygons. Subclasses provide paintDevice() and flush(rect).
+    '''
+    def setupRenderer(self, width, height, viewer_to_screen, screen_to_center, rotation=None):
         self.width, self.height = width, height
         self.vts, self.stc = viewer_to_screen, screen_to_center
         self.center = Point2D(width // 2, height // 2)
+        self.rotation = rotation  # (3, 3) world to view space, None for the front view
+
+        self.painter = None
+        self.color_table = None
+        self.table_brushes = []  # [hue][level] brushes of color_table
+        self.shadow_brush = QBrush(Qt.gray, Qt.SolidPattern)
+        self.polygons = {}
+        # bounding rectangles of what was drawn in the last and current frame
+        self.last_rect = QRectF(0, 0, width, height)
+        self.frame_rect = QRectF()
+
+    def render(self, scene):
+        scene.draw(self)
+
+    def pick(self, scene, x, y):
+        return scene.pick(self, x, y)
+
+    def beginFrame(self):
+        ''' erase the last frame and open the one painter used for the frame '''
+        self.painter = QPainter(self.paintDevice())
+        self.painter.fillRect(self.last_rect, Qt.white)
+        self.painter.setPen(QPen(Qt.NoPen))
+        self.frame_rect = QRectF()
+
+    def endFrame(self):
+        self.painter.end()
+        self.painter = None
+        # only repaint the damaged area: the old and the new drawing
+        damaged = self.last_rect.united(self.frame_rect).toAlignedRect()
+        self.flush(damaged.adjusted(-1, -1, 1, 1))
+        self.last_rect = self.frame_rect.adjusted(-1, -1, 1, 1)
+
+    def polygon(self, points):
+        # QPolygonF backed by a preallocated buffer, one per point count
+        n = len(points)
+        if n not in self.polygons:
+            poly = QPolygonF(n)
+            ptr = poly.data()
+            ptr.setsize(n * 2 * 8)
+            self.polygons[n] = (poly, np.frombuffer(ptr, np.float64).reshape(n, 2))
+        poly, buf = self.polygons[n]
+        buf[:] = points
+        return poly
+
+    def drawPolygon(self, points, brush):
+        poly = self.polygon(points)
+        self.frame_rect = self.frame_rect.united(poly.boundingRect())
+        self.painter.setBrush(brush)
+        self.painter.drawPolygon(poly)
+
+    def useColors(self, table):
+        ''' make a brush for every color of a tools.lighting.ColorTable, once '''
+        if table is not self.color_table:
+            self.color_table = table
+            self.table_brushes = [[QBrush(QColor(r, g, b), Qt.SolidPattern)
+                                   for b, g, r, a in levels] for levels in table.bgra.tolist()]
+
+    def drawShaded(self, points, hue, level):
+        ''' draw with the color_table color of the hue-th hue at level '''
+        self.drawPolygon(points, self.table_brushes[hue][level])
+
+    def drawShadow(self, points):
+        self.drawPolygon(points, self.shadow_brush)
+
+    def drawRaster(self, bgra):
+        ''' draw a (height, width, 4) uint8 array, alpha 0 is transparent '''
+        height, width = bgra.shape[:2]
+        image = QImage(bgra.data, width, height, 4 * width, QImage.Format_ARGB32)
+        self.painter.drawImage(0, 0, image)
+        covered = np.flatnonzero(bgra[..., 3].any(axis=0)), np.flatnonzero(bgra[..., 3].any(axis=1))
+        if len(covered[0]):
+            x, y = covered
+            self.frame_rect = self.frame_rect.united(
+                QRectF(x[0], y[0], x[-1] - x[0] + 1, y[-1] - y[0] + 1))
+
+
+class Canvas(FrameRenderer, DragInput, QLabel):
+    interacted = pyqtSignal()
+
+    def __init__(self, width, height, viewer_to_screen, screen_to_center):
+        super(Canvas, self).__init__()
+        self.setupRenderer(width, height, viewer_to_screen, screen_to_center)
         self.setPixmap(QPixmap(width, height))
         self.pixmap().fill(QColor(Qt.white))
         self.update()  # preexisting method
 
-        self.pressed = False
-        self.position = None
+        self.setupInput()
+        self.overlay = False
 
-    def drawFace(self, points, brightness=None, color=120):
-        p = QPainter(self.pixmap())
-        p.setPen(QPen(Qt.NoPen))
-        shade = brightness * 200 + 55
-        p.setBrush(QBrush(QColor.fromHsv(color, 255, shade, 255),
-                   Qt.SolidPattern))
-        qpts = [QPoint(pt.x, pt.y) for pt in points]
-        p.drawPolygon(*qpts)
+    def paintDevice(self):
+        return self.pixmap()
 
-    def drawShadow(self, points):
-        p = QPainter(self.pixmap())
-        p.setPen(QPen(Qt.NoPen))
-        p.setBrush(QBrush(Qt.gray, Qt.SolidPattern))
-        qpts = [QPoint(pt.x, pt.y) for pt in points]
-        p.drawPolygon(*qpts)
+    def endFrame(self):
+        if self.overlay:
+            self.drawOverlay()
+        super(Canvas, self).endFrame()
+
+    def drawOverlay(self):
+        ''' frame budget and per-stage timings in the top left corner '''
+        stats = PROFILER.stats()
+        lines = ["budget {:.1f} ms".format(1000 / FPS)]
+        for name in ['frame', 'update', 'visibility', 'sort', 'rasterize', 'blit']:
+            if name in stats:
+                lines.append("{:<10} p50 {:6.2f}  p99 {:6.2f} ms".format(
+                    name, stats[name]['p50'], stats[name]['p99']))
+        rect = QRectF(5, 5, 320, 16 * len(lines) + 8)
+        self.painter.fillRect(rect, Qt.white)
+        self.painter.setPen(QPen(Qt.black))
+        self.painter.setFont(QFont('monospace', 9))
+        self.painter.drawText(rect.adjusted(4, 4, 0, 0), Qt.AlignLeft, '\n'.join(lines))
+        self.painter.setPen(QPen(Qt.NoPen))
+        self.frame_rect = self.frame_rect.united(rect)
+
+    def paintEvent(self, e):
+        # the pixmap blit
+        with PROFILER.span('blit'):
+            super(Canvas, self).paintEvent(e)
+
+    def flush(self, rect):
+        self.update(rect)
 
-    def clearAll(self):
+
+class OffscreenCanvas(FrameRenderer):
+    ''' renders into a QImage, needs neither a window nor a display '''
+    def __init__(self, width, height, viewer_to_screen, screen_to_center, rotation=None):
+        self.setupRenderer(width, height, viewer_to_screen, screen_to_center, rotation)
+        self.image = QImage(width, height, QImage.Format_RGB32)
+        self.image.fill(Qt.white)
+
+    def paintDevice(self):
+        return self.image
+
+    def flush(self, rect):
+        pass
+
+    def toArray(self):
+        ''' copy of the image as a (height, width, 4) uint8 BGRA raster '''
+        ptr = self.image.constBits()
+        ptr.setsize(self.image.sizeInBytes())
+        rows = np.frombuffer(ptr, np.uint8).reshape(self.height, self.image.bytesPerLine())
+        return rows[:, :self.width * 4].reshape(self.height, self.width, 4).copy()
+
+
+class MultiCanvas(DragInput, QLabel):
+    '''
+    The views of tools.views.CAMERAS in a grid, each drawn into an
+    OffscreenCanvas of its own by a worker thread, then copied into the
+    pixmap together.
+    '''
+    interacted = pyqtSignal()
+
+    def __init__(self, width, height, viewer_to_screen, screen_to_center, columns=2):
+        super(MultiCanvas, self).__init__()
+        views = cameras(viewer_to_screen, screen_to_center)
+        w, h = width // columns, height // -(-len(views) // columns)
+        self.views = [View(name, OffscreenCanvas(w, h, vts, stc, rotation))
+                      for name, rotation, vts, stc in views]
+        self.offsets = [Point2D(w * (i % columns), h * (i // columns)) for i in range(len(views))]
+        self.multiview = MultiView(self.views)
+        self.setPixmap(QPixmap(width, height))
         self.pixmap().fill(QColor(Qt.white))
 
-    def mousePressEvent(self, e):
-        self.pressed = True
-        self.position = Point2D(e.pos().x(), e.pos().y())
+        self.setupInput()
+        self.overlay = False  # the profiler overlay is drawn by the single view canvas only
+
+    def render(self, scene):
+        self.multiview.render(scene)
+        painter = QPainter(self.pixmap())
+        painter.setPen(QPen(Qt.gray))
+        for view, offset in zip(self.views, self.offsets):
+            canv = view.canvas
+            painter.drawImage(offset.x, offset.y, canv.image)
+            painter.drawRect(offset.x, offset.y, canv.width - 1, canv.height - 1)
+            painter.drawText(offset.x + 6, offset.y + 16, view.name)
+        painter.end()
+        self.update()
+
+    def pick(self, scene, x, y):
+        ''' scene.pick in the view under canvas pixel (x, y) '''
+        for view, offset in zip(self.views, self.offsets):
+            canv = view.canvas
+            if 0 <= x - offset.x < canv.width and 0 <= y - offset.y < canv.height:
+                return scene.pick(canv, x - offset.x, y - offset.y)
+        return None
 
-    def mouseMoveEvent(self, e):
-        if self.pressed:
-            self.position = Point2D(e.pos().x(), e.pos().y())
+    def shutdown(self):
+        ''' stops the worker threads, the canvas can't render afterwards '''
+        self.multiview.close()
 
-    def mouseReleaseEvent(self, e):
-        self.pressed = False
-        self.position = None
+
+def createCanvas(backend):
+    '''
+    the canvas widget of a backend: 'raster' paints into a pixmap, 'gl'
+    and 'gl-software' keep the scene in OpenGL buffers and fall back to
+    'raster' if no OpenGL 2 context can be made. The OpenGL canvas always
+    draws with a headlight at full detail: the lighting (L) and visibility
+    mode (V) keys and the detail levels of the frame pacer don't change it.
+    '''
+    if backend in ('gl', 'gl-software'):
+        # imported on demand, the raster path doesn't need it
+        from tools.glcanvas import GLCanvas, glAvailable
+        if glAvailable():
+            print("the OpenGL canvas ignores the lighting, visibility mode and detail "
+                  "settings", file=sys.stderr)
+            return GLCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER,
+                            GROUND_DISTANCE, NEAR_DISTANCE)
+        print("OpenGL is not available, using the raster canvas", file=sys.stderr)
+    return Canvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, scene_path=None, backend='raster', views=False, **kwargs):
         super(MainWindow, self).__init__(*args, **kwargs)
         self.setGeometry(WINDOW_X, WINDOW_Y, CANVAS_WIDTH, CANVAS_HEIGHT)
         self.setWindowTitle("PyQt Drawing")
         self.setWindowIcon(QIcon('pythonlogo.png'))
-        self.canvas = Canvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+        if views:
+            self.canvas = MultiCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN,
+                                      SCREEN_TO_CENTER)
+        else:
+            self.canvas = createCanvas(backend)
+            if hasattr(self.canvas, 'failed'):
+                # queued, the canvas is replaced after its initializeGL returned
+                self.canvas.failed.connect(self.useRaster, Qt.QueuedConnection)
         self.setCentralWidget(self.canvas)
         self.show()
 
-        disp = EDGE_LENGTH / 4 + INTERSPACE / 2
-        colors = [0, 45, 90, 135, 180, 225, 270, 315]
-
-        self.cubes = [
-                Cube(Point( disp,  disp,  disp), self.canvas, colors[3]),
-                Cube(Point( disp,  disp, -disp), self.canvas, colors[0]),
-                Cube(Point( disp, -disp, -disp), self.canvas, colors[6]),
-                Cube(Point( disp, -disp,  disp), self.canvas, colors[1]),
-                Cube(Point(-disp, -disp,  disp), self.canvas, colors[4]),
-                Cube(Point(-disp,  disp,  disp), self.canvas, colors[7]),
-                Cube(Point(-disp,  disp, -disp), self.canvas, colors[2]),
-                Cube(Point(-disp, -disp, -disp), self.canvas, colors[5])
-        ]
-
-        self.update()
+        # with a scene path, the session is resumed from and saved to it
+        self.scene_path = scene_path
+        self.scene = openScene(scene_path)
+        # coast along the slowing down half of the ease curve
+        coast = EaseTable(lambda u: ease(EASE_MAX / 2 * (1 + u)) / ease(EASE_MAX / 2), 1)
+        self.animator = Animator(lambda dx, dy: self.scene.rotate(Vector2D(dx, dy)), coast)
 
+        # frames are scheduled by input and animation, at most FPS per second
         self.timer = QTimer()
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.mainloop)
-        self.timer.start(1000 // FPS)
+        self.canvas.interacted.connect(self.schedule)
+        self.last_frame = 0
+        self.pacer = FramePacer(FPS)
+
+        self.mainloop()
+
+    def schedule(self):
+        if not self.timer.isActive():
+            elapsed = (time.monotonic() - self.last_frame) * 1000
+            self.timer.start(max(0, int(1000 * self.pacer.interval() - elapsed)))
 
     def update(self):
-        mytuples = []
-        for cube in self.cubes:
-            z = cube.update()
-            mytuples.append((z, cube))
-
-        for z, cube in sorted(mytuples, key=lambda x: x[0]):
-            cube.draw()
-
-    def ease(self, t):
-        t1, t2, t3, t4, t5, t6 = 10, 20, 30, 40, 50, EASE_MAX
-        max_val = 3
-        if t < t1:
-            val = 0
-        elif t < t2:
-            val = (max_val / 2 / (t2 - t1)**2) * (t - t1)**2
-        elif t < t3:
-            val = - (max_val / 2 / (t2 - t3)**2) * (t - t3)**2 + max_val
-        elif t < t4:
-            val = max_val
-        elif t < t5:
-            val = - (max_val / 2 / (t5 - t4)**2) * (t - t4)**2 + max_val
+        ''' apply pending input and animation, returns True if any cube moved '''
+        now = time.monotonic()
+        if self.canvas.pressed:
+            # grabbing the scene stops it
+            self.animator.stop()
+        # the queued deltas are composed into the scene's rotation
+        self.animator.drag(self.canvas.takeMoves())
+        released = self.canvas.takeRelease()
+        if released is not None:
+            self.animator.release(released, now)
+        self.animator.advance(now)
+        clicked = self.canvas.takeClick()
+        if clicked is not None:
+            self.select(clicked)
+        return self.scene.update()
+
+    def select(self, position):
+        picked = self.canvas.pick(self.scene, position.x, position.y)
+        if picked is None:
+            self.setWindowTitle("PyQt Drawing")
         else:
-            val = (max_val / 2 / (t5 - t6)**2) * (t - t6)**2
-        return val
+            cube, face = picked
+            self.setWindowTitle("PyQt Drawing - cube {}, face {}".format(cube, face % 6))
 
-    def mainloop(self):
-        self.canvas.clearAll()
-        self.update()
-        self.canvas.update()
+    def draw(self):
+        self.canvas.render(self.scene)
+
+    def useRaster(self, log):
+        ''' replaces an OpenGL canvas whose shaders didn't link by the raster canvas '''
+        print("OpenGL shaders failed, using the raster canvas\n" + log, file=sys.stderr)
+        self.canvas = Canvas(CANVAS_WIDTH, CANVAS_HEIGHT, VIEWER_TO_SCREEN, SCREEN_TO_CENTER)
+        self.canvas.interacted.connect(self.schedule)
+        self.setCentralWidget(self.canvas)
+        self.draw()
+
+    def keyPressEvent(self, e):
+        if e.key() == Qt.Key_V:
+            # cycle through the visibility modes
+            modes = list(VISIBILITY_MODES.values())
+            current = modes.index(type(self.scene.visibility_mode))
+            self.scene.visibility_mode = modes[(current + 1) % len(modes)]()
+            self.draw()
+        elif e.key() == Qt.Key_L:
+            current = LIGHTINGS.index(self.scene.lighting) if self.scene.lighting in LIGHTINGS else -1
+            self.scene.lighting = LIGHTINGS[(current + 1) % len(LIGHTINGS)]
+            self.draw()
+        elif e.key() == Qt.Key_P:
+            # toggle profiling and its overlay
+            self.canvas.overlay = PROFILER.toggle()
+            if not PROFILER.enabled:
+                PROFILER.reset()
+            self.draw()
 
+    def closeEvent(self, e):
+        self.timer.stop()
+        if isinstance(self.canvas, MultiCanvas):
+            self.canvas.shutdown()
+        if self.scene_path is not None:
+            self.scene.save(self.scene_path)
+        super(MainWindow, self).closeEvent(e)
 
+    def mainloop(self):
+        self.last_frame = time.monotonic()
+        with PROFILER.span('frame'):
+            moved = self.update()
+            if self.animator.active:
+                # keep coasting without input
+                self.schedule()
+            if not moved:
+                # static scene, nothing to redraw
+                return
+            self.draw()
+        # what the frame took, not counting the wait for the next one
+        if self.pacer.record(time.monotonic() - self.last_frame):
+            self.scene.detail = self.pacer.detail